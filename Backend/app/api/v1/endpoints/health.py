@@ -24,7 +24,7 @@ async def db_health():
         
     try:
         # Check Redis connection
-        redis.ping()
+        await redis.ping()
         redis_status = "connected"
     except Exception:
         redis_status = "disconnected"
@@ -10,6 +10,7 @@ from app.models.prompt_template import (
 )
 from app.models import ClassificationClasses, ClassificationClassesCreate, ClassificationClassesUpdate, ClassificationClassesResponse
 from app.services.prompt_template_service import PromptTemplateService
+from app.services.dynamic_prompt_service import dynamic_prompt_service
 from app.services.classification_classes_service import ClassificationClassesService
 from app.middleware.admin_auth import verify_admin_token
 
@@ -46,6 +47,7 @@ async def create_prompt(prompt_data: PromptTemplateCreate):
     """Create a new prompt template"""
     try:
         template = await PromptTemplateService.create_prompt_template(prompt_data)
+        dynamic_prompt_service.clear_prompt_cache(prompt_data.prompt_key)
         return PromptTemplateResponse(**template.dict())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -58,6 +60,7 @@ async def update_prompt(prompt_key: str, update_data: PromptTemplateUpdate):
     """Update a prompt template"""
     try:
         template = await PromptTemplateService.update_prompt_template(prompt_key, update_data)
+        dynamic_prompt_service.clear_prompt_cache(prompt_key)
         if not template:
             raise HTTPException(status_code=404, detail="Prompt template not found")
         return PromptTemplateResponse(**template.dict())
@@ -72,6 +75,7 @@ async def delete_prompt(prompt_key: str):
     """Delete a prompt template"""
     try:
         success = await PromptTemplateService.delete_prompt_template(prompt_key)
+        dynamic_prompt_service.clear_prompt_cache(prompt_key)
         if not success:
             raise HTTPException(status_code=404, detail="Prompt template not found")
         return {"message": "Prompt template deleted successfully"}
@@ -86,6 +90,7 @@ async def initialize_default_prompts():
     """Initialize default prompt templates from existing codebase"""
     try:
         await PromptTemplateService.initialize_default_prompts()
+        dynamic_prompt_service.clear_prompt_cache()
         return {"message": "Default prompts initialized successfully"}
     except Exception as e:
         logger.error(f"Error initializing default prompts: {e}")
@@ -96,6 +101,7 @@ async def initialize_default_prompt(prompt_key: str):
     """Initialize a specific default prompt by its key"""
     try:
         success = await PromptTemplateService.initialize_default_prompt_by_key(prompt_key)
+        dynamic_prompt_service.clear_prompt_cache(prompt_key)
         if not success:
             raise HTTPException(status_code=404, detail=f"No default prompt found for key: {prompt_key}")
         return {"message": f"Default prompt '{prompt_key}' initialized successfully"}
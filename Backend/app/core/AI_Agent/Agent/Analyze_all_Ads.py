@@ -21,6 +21,7 @@ class GraphState(TypedDict):
     access_token: str
     account_id: str
     analyzed_video_ids: List[str]  # List of already analyzed video IDs to skip
+    batch_mode: bool  # Submit frame analysis through the OpenAI Batch API
     
     # Processing state (these can be updated by nodes)
     ads: Annotated[list, operator.add]
@@ -31,6 +32,11 @@ class GraphState(TypedDict):
     transcription_analysis: Annotated[list, operator.add]
     frame_analysis: Annotated[list, operator.add]
     final_ad_analysis: Annotated[list, operator.add]
+    frame_batch: Dict[str, Any]  # Pending OpenAI batch submitted by Analyze Frames
+    
+    # Download pipeline
+    download_queues: Dict[str, Any]  # Consumer -> asyncio.Queue of downloaded video paths, drained as they arrive
+    downloads_done: Any  # asyncio.Event set once Download Video has finished
     
     # Cancellation and progress
     cancelled: bool  # Flag to indicate if the job should be cancelled
@@ -47,7 +53,7 @@ from ..Nodes.download_video import download_videos
 from ..Nodes.transcribe_video import transcribe_all_videos
 from ..Nodes.extract_frames import extract_all_videos_as_base64_frames
 from ..Nodes.analyze_transcription import analyze_all_transcriptions
-from ..Nodes.analyze_frames import analyze_all_frames
+from ..Nodes.analyze_frames import analyze_all_frames, collect_frame_batch_results
 from ..Nodes.analyze_ad import final_ad_analysis
 
 # ---- Cancellation support ----
@@ -72,18 +78,22 @@ def build_graph():
     builder.add_node("Extract Frames", extract_all_videos_as_base64_frames)
     builder.add_node("Analyze Transcription", analyze_all_transcriptions)
     builder.add_node("Analyze Frames", analyze_all_frames)
+    builder.add_node("Collect Frame Batch", collect_frame_batch_results)
     builder.add_node("Analyze Ad", final_ad_analysis)
 
     builder.set_entry_point("Get Facebook Ads")
 
     builder.add_edge("Get Facebook Ads", "Get Video URLs")
     builder.add_edge("Get Video URLs", "Download Video")
-    builder.add_edge("Download Video", "Transcribe Video")
-    builder.add_edge("Download Video", "Extract Frames")
+    # Transcription and frame extraction run alongside the downloads, each picking up videos
+    # from its own download queue, so neither branch waits for the other
+    builder.add_edge("Get Video URLs", "Transcribe Video")
+    builder.add_edge("Get Video URLs", "Extract Frames")
+    builder.add_edge("Download Video", END)
     builder.add_edge("Transcribe Video", "Analyze Transcription")
     builder.add_edge("Extract Frames", "Analyze Frames")
-    builder.add_edge("Analyze Transcription", "Analyze Ad")
-    builder.add_edge("Analyze Frames", "Analyze Ad")
+    builder.add_edge("Analyze Frames", "Collect Frame Batch")
+    builder.add_edge(["Analyze Transcription", "Collect Frame Batch"], "Analyze Ad")
     builder.add_edge("Analyze Ad", END)
 
     return builder.compile()
@@ -95,7 +105,8 @@ async def run_ad_analysis_graph(
     account_id: str,
     analyzed_video_ids: Optional[List[str]] = None,
     progress_callback = None,
-    cancellation_token = None  # Add cancellation token parameter
+    cancellation_token = None,  # Add cancellation token parameter
+    batch_mode: bool = False
 ) -> Dict[str, Any]:
     """
     Run the ad analysis graph and return the results in the format expected by the database.
@@ -107,6 +118,7 @@ async def run_ad_analysis_graph(
         analyzed_video_ids: List of video IDs that are already analyzed (to skip)
         progress_callback: Optional callback function to report progress (progress, message)
         cancellation_token: Optional cancellation token to stop execution
+        batch_mode: Analyze frames through the OpenAI Batch API (cheaper, slower)
         
     Returns:
         Dict containing processed database results and list of current active ad IDs
@@ -136,6 +148,7 @@ async def run_ad_analysis_graph(
             "access_token": access_token,
             "account_id": account_id,
             "analyzed_video_ids": analyzed_video_ids,
+            "batch_mode": batch_mode,
             "ads": [],
             "video_urls": [],
             "downloaded_videos": [],
@@ -144,6 +157,9 @@ async def run_ad_analysis_graph(
             "transcription_analysis": [],
             "frame_analysis": [],
             "final_ad_analysis": [],
+            "frame_batch": {},
+            "download_queues": {"transcribe": asyncio.Queue(), "extract_frames": asyncio.Queue()},
+            "downloads_done": asyncio.Event(),
             "errors": [],
             "progress_callback": progress_callback,  # Pass progress callback to nodes
             "cancelled": False,  # Initialize cancellation flag
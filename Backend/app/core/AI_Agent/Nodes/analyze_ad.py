@@ -2,8 +2,10 @@ import os
 import json
 import re
 import logging
+import functools
 from pathlib import Path
 from typing import Dict, Any
+import tiktoken
 from app.services.openai_service import openai_service
 from app.services.dynamic_prompt_service import dynamic_prompt_service
 
@@ -12,6 +14,21 @@ logger = logging.getLogger(__name__)
 # Prompt template
 # AD_ANALYSIS_PROMPT moved to dynamic prompt template "ad_analysis"
 
+# gpt-4o has a 128K context window; leave headroom for the template and response
+MAX_PROMPT_TOKENS = 120_000
+MAX_FIELD_TOKENS = 40_000
+
+@functools.cache
+def get_encoding(model: str = "gpt-4o") -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(model)
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    enc = get_encoding(model)
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
 def clean_json_string(text: str) -> str:
     # Remove leading/trailing whitespace and code block markers
     text = text.strip().removeprefix("```json").removesuffix("```").strip()
@@ -33,6 +50,14 @@ async def analyze_combined_ad(transcription: str, visual_summary: str, cancellat
         return {}
         
     try:
+        # Truncate the high-variance fields rather than sending a prompt the model will reject
+        enc = get_encoding()
+        n_tokens = len(enc.encode(transcription)) + len(enc.encode(visual_summary))
+        if n_tokens > MAX_PROMPT_TOKENS:
+            logger.warning(f"[⚠️] Ad analysis input is {n_tokens} tokens, truncating to fit context window")
+            transcription = truncate_to_tokens(transcription, MAX_FIELD_TOKENS)
+            visual_summary = truncate_to_tokens(visual_summary, MAX_FIELD_TOKENS)
+
         # Use dynamic prompt service for ad analysis
         prompt_variables = {
             "transcription": transcription,
@@ -1,14 +1,53 @@
 import os
-import json
-import base64
+import re
+import orjson
+import pybase64
+import hashlib
+import asyncio
 import logging
+import cv2
+import numpy as np
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+from app.core.database import get_redis
+from app.core.cancellation import gather_unless_cancelled
 from app.services.openai_service import openai_service
 from app.services.dynamic_prompt_service import dynamic_prompt_service
 
 logger = logging.getLogger(__name__)
 
+# Markdown code fence around JSON responses
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```\s*$")
+
+# Multiple of 3 bytes so independently encoded chunks concatenate into valid base64
+BASE64_CHUNK_SIZE = 57 * 1024
+
+# Upper bound on simultaneous OpenAI vision requests across all videos of a job
+MAX_CONCURRENT_FRAME_REQUESTS = 10
+_frame_request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FRAME_REQUESTS)
+
+# Frames above this size are downscaled before upload; the vision API resizes them server-side anyway
+DOWNSCALE_THRESHOLD_BYTES = 80 * 1024
+MAX_FRAME_DIMENSION = 512
+# High detail images are scaled server-side so their shortest side is at most 768 px
+HIGH_DETAIL_MAX_SHORT_SIDE = 768
+FRAME_JPEG_QUALITY = 80
+DOWNSCALE_CACHE_SIZE = 512
+_downscaled_frames: Dict[bytes, str] = {}
+
+# Frames whose difference hashes differ in at most this many of 64 bits are treated as the same shot
+FRAME_HASH_DISTANCE_THRESHOLD = 4
+
+# Seconds between status checks of a submitted OpenAI batch
+BATCH_POLL_INTERVAL = 30
+# Consecutive failed status checks tolerated before the batch is abandoned
+BATCH_POLL_MAX_ERRORS = 5
+
+# Frame labels are cached in Redis by image content and prompt
+FRAME_CACHE_PREFIX = "frame_analysis:"
+FRAME_CACHE_TTL = 86400  # seconds
+
 def encode_image_to_base64(image_path: Path) -> str:
     """
     Converts an image to a base64 encoded string.
@@ -19,8 +58,145 @@ def encode_image_to_base64(image_path: Path) -> str:
     Returns:
         str: Base64 encoded string of the image.
     """
+    # Encode in chunks so the whole raw image is never held alongside its encoding
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+        return b"".join(
+            pybase64.b64encode(chunk)
+            for chunk in iter(lambda: image_file.read(BASE64_CHUNK_SIZE), b"")
+        ).decode('ascii')
+
+def downscale_frame_b64(frame_b64: str, max_dimension: int = MAX_FRAME_DIMENSION, short_side: bool = False) -> str:
+    """
+    Downscales and JPEG-recompresses a base64 frame so it is cheaper to upload.
+
+    Args:
+        frame_b64 (str): Base64 encoded JPEG image data.
+        max_dimension (int): Maximum size in pixels of the limited side.
+        short_side (bool): Limit the shortest side instead of the longest one.
+
+    Returns:
+        str: Base64 encoded JPEG no larger than max_dimension on the limited side,
+        or the original data if it is already small or cannot be decoded.
+    """
+    raw = pybase64.b64decode(frame_b64)
+    if len(raw) <= DOWNSCALE_THRESHOLD_BYTES:
+        return frame_b64
+
+    key = hashlib.sha1(raw).digest() + bytes(f"{max_dimension}:{short_side}", "ascii")
+    cached = _downscaled_frames.get(key)
+    if cached is not None:
+        return cached
+
+    image = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return frame_b64
+
+    height, width = image.shape[:2]
+    scale = max_dimension / (min(height, width) if short_side else max(height, width))
+    if scale < 1:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, FRAME_JPEG_QUALITY])
+    if not ret:
+        return frame_b64
+
+    result = pybase64.b64encode_as_string(buffer)
+
+    # Evict the oldest entry once the cache is full
+    if len(_downscaled_frames) >= DOWNSCALE_CACHE_SIZE:
+        _downscaled_frames.pop(next(iter(_downscaled_frames)))
+    _downscaled_frames[key] = result
+    return result
+
+def _frame_hash(frame_b64: str) -> Optional[int]:
+    """64-bit difference hash of a base64 frame, or None if it cannot be decoded."""
+    raw = pybase64.b64decode(frame_b64)
+    image = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def cluster_similar_frames(frames: list) -> list:
+    """
+    Groups visually near-identical frames so only one of each group is sent for analysis.
+
+    Args:
+        frames (list): Base64 encoded frames of one video, in order.
+
+    Returns:
+        list: For each frame, the index of the frame representing its group.
+    """
+    representatives = []  # (index, hash) of each group's first frame
+    assignment = []
+
+    for i, frame_b64 in enumerate(frames):
+        frame_hash = _frame_hash(frame_b64)
+        representative = None
+
+        if frame_hash is not None:
+            for index, representative_hash in representatives:
+                if bin(frame_hash ^ representative_hash).count("1") <= FRAME_HASH_DISTANCE_THRESHOLD:
+                    representative = index
+                    break
+
+        if representative is None:
+            representative = i
+            if frame_hash is not None:
+                representatives.append((i, frame_hash))
+
+        assignment.append(representative)
+
+    return assignment
+
+def _frame_cache_key(frame_b64: str, prompt_text: str) -> str:
+    """Cache key from the SHA-256 of the decoded image bytes and the prompt used."""
+    digest = hashlib.sha256(pybase64.b64decode(frame_b64))
+    digest.update(prompt_text.encode("utf-8"))
+    return FRAME_CACHE_PREFIX + digest.hexdigest()
+
+async def _get_cached_frame_label(key: str) -> Optional[str]:
+    try:
+        return await get_redis().get(key)
+    except Exception as e:
+        logger.debug("Frame cache lookup failed: %s", e)
+        return None
+
+async def _get_cached_frame_labels(keys: List[str]) -> List[Optional[str]]:
+    """Look up several frame labels in one round-trip."""
+    try:
+        return await get_redis().mget(keys)
+    except Exception as e:
+        logger.debug("Frame cache lookup failed: %s", e)
+        return [None] * len(keys)
+
+async def _cache_frame_label(key: str, label: str):
+    # Never cache failures, they should be retried on the next run
+    if not label or label in ("Error", "Cancelled"):
+        return
+    try:
+        await get_redis().setex(key, FRAME_CACHE_TTL, label)
+    except Exception as e:
+        logger.debug("Frame cache write failed: %s", e)
+
+def _product_cache_key(frame_cache_keys: List[str]) -> str:
+    """Cache key for the product extracted from a set of frames, built from their label cache keys (which include the prompt)."""
+    return FRAME_CACHE_PREFIX + "product:" + hashlib.sha256("".join(frame_cache_keys).encode("ascii")).hexdigest()
+
+async def _get_cached_product_info(key: str) -> Optional[dict]:
+    try:
+        cached = await get_redis().get(key)
+        return orjson.loads(cached) if cached else None
+    except Exception as e:
+        logger.debug("Product cache lookup failed: %s", e)
+        return None
+
+async def _cache_product_info(key: str, product_info: dict):
+    try:
+        await get_redis().setex(key, FRAME_CACHE_TTL, orjson.dumps(product_info).decode())
+    except Exception as e:
+        logger.debug("Product cache write failed: %s", e)
 
 async def analyze_frame(image_path: Path) -> str:
     """
@@ -33,7 +209,8 @@ async def analyze_frame(image_path: Path) -> str:
         str: Analysis result for the image.
     """
     try:
-        image_b64 = encode_image_to_base64(image_path)
+        # Read the file off the event loop so concurrent frame requests are not stalled
+        image_b64 = await asyncio.to_thread(encode_image_to_base64, image_path)
         
         # Get the prompt text from dynamic prompt service
         prompt_text, model, temperature, max_tokens = await dynamic_prompt_service.get_prompt_and_settings("frame_analysis")
@@ -46,7 +223,7 @@ async def analyze_frame(image_path: Path) -> str:
                     "role": "user",
                     "content": [
                         {"type": "text", "text": prompt_text},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"}}
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}", "detail": "low"}}
                     ]
                 }
             ],
@@ -67,17 +244,50 @@ async def analyze_frame_from_base64(frame_b64: str, frame_name: str, cancellatio
         frame_name (str): Name of the frame for logging.
         cancellation_token: Cancellation token to check for job cancellation.
 
+    Returns:
+        str: Analysis result for the image.
+    """
+    prompt_text, model, temperature, max_tokens = await dynamic_prompt_service.get_prompt_and_settings("frame_analysis")
+    return await analyze_frame_with_prompt(
+        frame_b64, frame_name, prompt_text, model, temperature, max_tokens, cancellation_token
+    )
+
+async def analyze_frame_with_prompt(
+    frame_b64: str,
+    frame_name: str,
+    prompt_text: str,
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    cancellation_token=None
+) -> str:
+    """
+    Analyzes a single frame from base64 data with an already fetched prompt,
+    so callers analyzing many frames look the prompt up only once.
+
+    Args:
+        frame_b64 (str): Base64 encoded image data.
+        frame_name (str): Name of the frame for logging.
+        prompt_text, model, temperature, max_tokens: Settings of the "frame_analysis" prompt.
+        cancellation_token: Cancellation token to check for job cancellation.
+
     Returns:
         str: Analysis result for the image.
     """
     # Check for cancellation before making request
     if cancellation_token and cancellation_token.get("cancelled", False):
-        logger.info(f"Job cancelled before analyzing frame {frame_name}")
+        logger.info("Job cancelled before analyzing frame %s", frame_name)
         return "Cancelled"
         
     try:
-        # Get the prompt text from dynamic prompt service
-        prompt_text, model, temperature, max_tokens = await dynamic_prompt_service.get_prompt_and_settings("frame_analysis")
+        # Identical frames have already been labelled by an earlier job
+        cache_key = _frame_cache_key(frame_b64, prompt_text)
+        cached = await _get_cached_frame_label(cache_key)
+        if cached:
+            return cached
+        
+        # Shrink the upload before sending it to the vision API
+        frame_b64 = downscale_frame_b64(frame_b64)
         
         # Use the robust OpenAI service with rate limiting
         messages = [
@@ -85,23 +295,26 @@ async def analyze_frame_from_base64(frame_b64: str, frame_name: str, cancellatio
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt_text},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}"}}
+                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}", "detail": "low"}}
                 ]
             }
         ]
         
-        result = await openai_service._make_chat_completion(
-            messages=messages,
-            model=model,
-            max_tokens=max_tokens or 50,
-            temperature=temperature,
-            cancellation_token=cancellation_token
-        )
+        async with _frame_request_semaphore:
+            result = await openai_service._make_chat_completion(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens or 50,
+                temperature=temperature,
+                cancellation_token=cancellation_token
+            )
         
-        return result.strip() if result else "Error"
+        result = result.strip() if result else "Error"
+        await _cache_frame_label(cache_key, result)
+        return result
     except ValueError as e:
         if "cancelled" in str(e).lower():
-            logger.info(f"Frame analysis cancelled for {frame_name}")
+            logger.info("Frame analysis cancelled for %s", frame_name)
             return "Cancelled"
         else:
             logger.error(f"[❌] Error analyzing frame {frame_name}: {e}", exc_info=True)
@@ -110,6 +323,194 @@ async def analyze_frame_from_base64(frame_b64: str, frame_name: str, cancellatio
         logger.error(f"[❌] Error analyzing frame {frame_name}: {e}", exc_info=True)
         return "Error"
 
+async def analyze_video_in_one_request(frames: list, video_name: str, cancellation_token=None, prompt_settings: Optional[tuple] = None) -> Optional[tuple]:
+    """
+    Labels all frames of a video and extracts its product with a single vision request.
+
+    The frames are sent at low detail for labelling, followed by the first frame at
+    high detail so product labels stay readable.
+
+    Args:
+        frames (list): Base64 encoded frames of one video, in order.
+        video_name (str): Name of the video for logging.
+        cancellation_token: Cancellation token to check for job cancellation.
+        prompt_settings (tuple): Pre-fetched "frame_product_analysis" prompt settings.
+
+    Returns:
+        tuple: (one analysis result per frame, product info), or None if the fused prompt
+        is unavailable or the response could not be parsed.
+    """
+    if prompt_settings is None:
+        prompt_settings = await dynamic_prompt_service.get_prompt_and_settings("frame_product_analysis")
+    prompt_text, model, temperature, max_tokens = prompt_settings
+    if not prompt_text:
+        return None
+
+    # Only send the frames that have not been labelled before
+    cache_keys = [_frame_cache_key(frame_b64, prompt_text) for frame_b64 in frames]
+    product_key = _product_cache_key(cache_keys)
+    labels = await _get_cached_frame_labels(cache_keys)
+    pending = [i for i, label in enumerate(labels) if not label]
+    if not pending:
+        cached_product = await _get_cached_product_info(product_key)
+        if cached_product is not None:
+            return labels, cached_product
+        # Every label is cached but the product isn't, so the frames have to be sent again
+        pending = list(range(len(frames)))
+
+    messages = _frame_message(
+        prompt_text.format(frame_count=len(pending)),
+        [downscale_frame_b64(frames[i]) for i in pending],
+        "low"
+    )
+    messages[0]["content"].append({
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:image/jpeg;base64,{downscale_frame_b64(frames[0], HIGH_DETAIL_MAX_SHORT_SIDE, short_side=True)}",
+            "detail": "high"
+        }
+    })
+
+    try:
+        async with _frame_request_semaphore:
+            result = await openai_service._make_chat_completion(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens or 50 * len(pending) + 100,
+                temperature=temperature,
+                cancellation_token=cancellation_token
+            )
+    except ValueError as e:
+        logger.warning(f"Combined frame analysis failed for {video_name}: {e}")
+        return None
+
+    if not result:
+        return None
+
+    try:
+        parsed = orjson.loads(_JSON_FENCE.sub("", result.strip()))
+    except orjson.JSONDecodeError:
+        logger.warning(f"Failed to parse combined frame JSON for {video_name}: {result}")
+        return None
+
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("labels"), list) or not isinstance(parsed.get("product"), dict):
+        logger.warning(f"Unexpected combined frame response for {video_name}: {result}")
+        return None
+
+    new_labels = parsed["labels"]
+    for n, i in enumerate(pending):
+        labels[i] = str(new_labels[n]).strip() if n < len(new_labels) else "Error"
+        await _cache_frame_label(cache_keys[i], labels[i])
+
+    product = parsed["product"]
+    product_info = {
+        "product": product.get("product", ""),
+        "product_type": product.get("product_type", "")
+    }
+    await _cache_product_info(product_key, product_info)
+
+    return labels, product_info
+
+async def _process_video_frames(frame_data: Dict[str, Any], analyzed_video_ids: list, prompts: Dict[str, tuple], cancellation_token=None) -> Optional[Dict[str, Any]]:
+    """
+    Analyze the frames and product information of a single video.
+    `prompts` maps prompt keys to settings fetched once for the whole job.
+
+    Returns:
+        The frame analysis result for the video, or None if it was skipped, failed or cancelled.
+    """
+    try:
+        video_id = frame_data.get("video_id")
+        video_name = frame_data.get("video", "")
+        frames = frame_data.get("frames", [])
+        
+        if not video_id or not video_name or not frames:
+            logger.warning(f"[⚠️] Missing data in frame_data: {frame_data}")
+            return None
+
+        # Skip if already analyzed
+        if video_id in analyzed_video_ids:
+            logger.info("[⏩] Skipping %s (already analyzed)", video_name)
+            return None
+
+        # Use video name without extension as folder name
+        folder_name = Path(video_name).stem
+
+        logger.info("[🎞️] Analyzing frames for: %s", folder_name)
+        analysis = {}
+
+        # Check for cancellation before dispatching the frame requests
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            logger.info("Job cancelled before analyzing frames of %s", folder_name)
+            return None
+
+        frame_names = [f"frame_{i+1}.jpg" for i in range(len(frames))]
+
+        # Only send one frame per group of near-identical frames; decoding every frame
+        # is blocking work, so keep it off the event loop
+        assignment = await asyncio.to_thread(cluster_similar_frames, frames)
+        representative_indices = sorted(set(assignment))
+        representative_frames = [frames[i] for i in representative_indices]
+        if len(representative_frames) < len(frames) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[🧠] Sending %s of %s frames for %s", len(representative_frames), len(frames), folder_name)
+
+        # Label the frames and extract the product in one request, falling back to
+        # one request per frame plus a separate product extraction request
+        product_info = None
+        combined = await analyze_video_in_one_request(
+            representative_frames, folder_name, cancellation_token, prompts["frame_product_analysis"]
+        )
+        if combined is not None:
+            representative_results, product_info = combined
+        else:
+            # Analyze all frames of the video concurrently; gather preserves input order
+            representative_results = await asyncio.gather(
+                *(analyze_frame_with_prompt(frames[i], frame_names[i], *prompts["frame_analysis"], cancellation_token)
+                  for i in representative_indices),
+                return_exceptions=True
+            )
+
+        # Broadcast each group's label back to all of its frames
+        results_by_index = dict(zip(representative_indices, representative_results))
+        results = [results_by_index[assignment[i]] for i in range(len(frames))]
+
+        # Keep track of seen results to avoid duplicates
+        seen_results = set()
+
+        for frame_name, result in zip(frame_names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"[❌] Error analyzing frame {frame_name} of {folder_name}: {result}")
+                result = "Error"
+
+            # Only include result if we haven't seen it before
+            if result not in seen_results:
+                analysis[frame_name] = result
+                seen_results.add(result)
+
+        logger.info("[✅] Analyzed frames for: %s", folder_name)
+        
+        # Also extract product information from the frames
+        if product_info is None:
+            if cancellation_token and cancellation_token.get("cancelled", False):
+                logger.info("Job cancelled before product extraction for %s", folder_name)
+                return None
+            
+            product_info = await extract_product_from_frames(
+                representative_frames, folder_name, cancellation_token, prompts["product_extraction_frames"]
+            )
+        
+        return {
+            "video_id": video_id,
+            "video": folder_name,
+            "analysis": analysis,
+            "product_info": product_info  # Add product information
+        }
+
+    except Exception as e:
+        error_msg = f"Error processing frames for video {frame_data.get('video', 'unknown')}: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return None
+
 async def analyze_all_frames(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     LangGraph-compatible node to analyze all frames and return analysis in memory only.
@@ -120,8 +521,6 @@ async def analyze_all_frames(state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Job cancelled during analyze_all_frames")
         return {"errors": ["Job was cancelled"]}
     
-    frame_analysis_results = []
-
     extracted_frames = state.get("extracted_frames", [])
     user_id = state.get("user_id")
     analyzed_video_ids = state.get("analyzed_video_ids", [])
@@ -137,86 +536,39 @@ async def analyze_all_frames(state: Dict[str, Any]) -> Dict[str, Any]:
 
     logger.info(f"[🎞️] Starting analysis of frames from {len(extracted_frames)} videos...")
 
-    for j, frame_data in enumerate(extracted_frames):
-        try:
-            # Check for cancellation before each video
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled during frame analysis (video {j+1}/{len(extracted_frames)})")
-                return {"errors": ["Job was cancelled"]}
-            
-            video_id = frame_data.get("video_id")
-            video_name = frame_data.get("video", "")
-            frames = frame_data.get("frames", [])
-            
-            if not video_id or not video_name or not frames:
-                logger.warning(f"[⚠️] Missing data in frame_data: {frame_data}")
-                continue
-
-            # Skip if already analyzed
-            if video_id in analyzed_video_ids:
-                logger.info(f"[⏩] Skipping {video_name} (already analyzed)")
-                continue
+    # Background jobs can trade latency for cost by going through the Batch API
+    if state.get("batch_mode", False):
+        return await _submit_frame_batch(extracted_frames, analyzed_video_ids)
 
-            # Use video name without extension as folder name
-            folder_name = Path(video_name).stem
+    # Process all videos concurrently; the OpenAI calls are bounded by _frame_request_semaphore
+    # Fetch each prompt once for the whole job instead of once per frame
+    prompts = {
+        prompt_key: await dynamic_prompt_service.get_prompt_and_settings(prompt_key)
+        for prompt_key in ("frame_analysis", "frame_product_analysis", "product_extraction_frames")
+    }
 
-            logger.info(f"[🎞️] Analyzing frames for: {folder_name}")
-            analysis = {}
+    results = await gather_unless_cancelled(
+        [_process_video_frames(frame_data, analyzed_video_ids, prompts, cancellation_token)
+         for frame_data in extracted_frames],
+        cancellation_token
+    )
 
-            # Keep track of seen results to avoid duplicates
-            seen_results = set()
-            
-            for i, frame_b64 in enumerate(frames):
-                # Check for cancellation before each frame
-                if cancellation_token and cancellation_token.get("cancelled", False):
-                    logger.info(f"Job cancelled during frame analysis (frame {i+1}/{len(frames)} of {folder_name})")
-                    return {"errors": ["Job was cancelled"]}
-                
-                frame_name = f"frame_{i+1}.jpg"
-                logger.debug(f"[🧠] Analyzing: {frame_name}")
-                
-                # Check for cancellation before calling OpenAI API
-                if cancellation_token and cancellation_token.get("cancelled", False):
-                    logger.info(f"Job cancelled before analyzing frame {frame_name} of {folder_name}")
-                    return {"errors": ["Job was cancelled"]}
-                
-                result = await analyze_frame_from_base64(frame_b64, frame_name, cancellation_token)
-                
-                # Only include result if we haven't seen it before
-                if result not in seen_results:
-                    analysis[frame_name] = result
-                    seen_results.add(result)
-
-            logger.info(f"[✅] Analyzed frames for: {folder_name}")
-            
-            # Also extract product information from the frames
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled before product extraction for {folder_name}")
-                return {"errors": ["Job was cancelled"]}
-            
-            product_info = await extract_product_from_frames(frames, folder_name, cancellation_token)
-            
-            frame_analysis_results.append({
-                "video_id": video_id,
-                "video": folder_name,
-                "analysis": analysis,
-                "product_info": product_info  # Add product information
-            })
+    if results is None or (cancellation_token and cancellation_token.get("cancelled", False)):
+        logger.info("Job cancelled during frame analysis")
+        return {"errors": ["Job was cancelled"]}
 
-        except Exception as e:
-            error_msg = f"Error processing frames for video {frame_data.get('video', 'unknown')}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+    frame_analysis_results = [result for result in results if result is not None]
 
     logger.info(f"[🎞️] Completed frame analysis for {len(frame_analysis_results)} videos")
     return {"frame_analysis": frame_analysis_results}
 
-async def extract_product_from_frames(frames: list, video_name: str, cancellation_token=None) -> dict:
+async def extract_product_from_frames(frames: list, video_name: str, cancellation_token=None, prompt_settings: Optional[tuple] = None) -> dict:
     """
     Extract product name and product type from the video frames.
     """
     # Check for cancellation before making request
     if cancellation_token and cancellation_token.get("cancelled", False):
-        logger.info(f"Job cancelled before product extraction from frames for {video_name}")
+        logger.info("Job cancelled before product extraction from frames for %s", video_name)
         return {"product": "", "product_type": ""}
     
     if not frames:
@@ -226,46 +578,38 @@ async def extract_product_from_frames(frames: list, video_name: str, cancellatio
     sample_frames = frames
     
     try:
-        # Get the prompt text from dynamic prompt service
-        prompt_text, model, temperature, max_tokens = await dynamic_prompt_service.get_prompt_and_settings("product_extraction_frames")
+        # Get the prompt text from dynamic prompt service unless the caller already did
+        if prompt_settings is None:
+            prompt_settings = await dynamic_prompt_service.get_prompt_and_settings("product_extraction_frames")
+        prompt_text, model, temperature, max_tokens = prompt_settings
         
         # Prepare messages with multiple frames
         message_content = [{"type": "text", "text": prompt_text}]
         
         for i, frame_b64 in enumerate(sample_frames):
+            # Anything above the resolution the API keeps for high detail is only extra payload
+            frame_b64 = downscale_frame_b64(frame_b64, HIGH_DETAIL_MAX_SHORT_SIDE, short_side=True)
             message_content.append({
                 "type": "image_url", 
-                "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}"}
+                # Product labels need OCR-level detail
+                "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}", "detail": "high"}
             })
         
         messages = [{"role": "user", "content": message_content}]
         
-        result = await openai_service._make_chat_completion(
-            messages=messages,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            cancellation_token=cancellation_token
-        )
+        async with _frame_request_semaphore:
+            result = await openai_service._make_chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                cancellation_token=cancellation_token
+            )
         
-        if result:
-            try:
-                import json
-                # Clean the result if it has markdown formatting
-                cleaned_result = result.strip().removeprefix("```json").removesuffix("```").strip()
-                product_info = json.loads(cleaned_result)
-                return {
-                    "product": product_info.get("product", ""),
-                    "product_type": product_info.get("product_type", "")
-                }
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse product JSON from frames: {result}")
-                return {"product": "", "product_type": ""}
-        else:
-            return {"product": "", "product_type": ""}
+        return parse_product_info(result)
     except ValueError as e:
         if "cancelled" in str(e).lower():
-            logger.info(f"Product extraction from frames cancelled for {video_name}")
+            logger.info("Product extraction from frames cancelled for %s", video_name)
             return {"product": "", "product_type": ""}
         else:
             logger.error(f"❌ Error extracting product from frames for {video_name}: {e}", exc_info=True)
@@ -274,5 +618,179 @@ async def extract_product_from_frames(frames: list, video_name: str, cancellatio
         logger.error(f"❌ Error extracting product from frames for {video_name}: {e}", exc_info=True)
         return {"product": "", "product_type": ""}
 
+def parse_product_info(result: Optional[str]) -> dict:
+    """
+    Parse the product extraction response into product and product_type.
+    """
+    if not result:
+        return {"product": "", "product_type": ""}
+    
+    try:
+        # Clean the result if it has markdown formatting
+        product_info = orjson.loads(_JSON_FENCE.sub("", result.strip()))
+        if not isinstance(product_info, dict):
+            logger.warning(f"Unexpected product JSON from frames: {result}")
+            return {"product": "", "product_type": ""}
+        return {
+            "product": product_info.get("product", ""),
+            "product_type": product_info.get("product_type", "")
+        }
+    except orjson.JSONDecodeError:
+        logger.warning(f"Failed to parse product JSON from frames: {result}")
+        return {"product": "", "product_type": ""}
+
+def _frame_message(prompt_text: str, frames: list, detail: str) -> list:
+    """Build a single user message with the prompt followed by the given frames."""
+    content = [{"type": "text", "text": prompt_text}]
+    content.extend(
+        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}", "detail": detail}}
+        for frame_b64 in frames
+    )
+    return [{"role": "user", "content": content}]
+
+async def _submit_frame_batch(extracted_frames: list, analyzed_video_ids: list) -> Dict[str, Any]:
+    """
+    Submit frame labelling and product extraction for all videos as one OpenAI batch.
+
+    Each request is addressed by custom_id "{video_id}:{frame_index}" for frames and
+    "{video_id}:product" for product extraction.
+    """
+    frame_prompt, frame_model, frame_temperature, frame_max_tokens = await dynamic_prompt_service.get_prompt_and_settings("frame_analysis")
+    product_prompt, product_model, product_temperature, product_max_tokens = await dynamic_prompt_service.get_prompt_and_settings("product_extraction_frames")
+
+    requests = []
+    videos = []
+
+    for frame_data in extracted_frames:
+        video_id = frame_data.get("video_id")
+        video_name = frame_data.get("video", "")
+        frames = frame_data.get("frames", [])
 
+        if not video_id or not video_name or not frames:
+            logger.warning(f"[⚠️] Missing data in frame_data: {frame_data}")
+            continue
+
+        if video_id in analyzed_video_ids:
+            logger.info("[⏩] Skipping %s (already analyzed)", video_name)
+            continue
+
+        for i, frame_b64 in enumerate(frames):
+            requests.append({
+                "custom_id": f"{video_id}:{i}",
+                "body": {
+                    "model": frame_model,
+                    "messages": _frame_message(frame_prompt, [downscale_frame_b64(frame_b64)], "low"),
+                    "temperature": frame_temperature,
+                    "max_tokens": frame_max_tokens or 50
+                }
+            })
+
+        product_body = {
+            "model": product_model,
+            "messages": _frame_message(
+                product_prompt,
+                [downscale_frame_b64(frame_b64, HIGH_DETAIL_MAX_SHORT_SIDE, short_side=True) for frame_b64 in frames],
+                "high"
+            ),
+            "temperature": product_temperature
+        }
+        if product_max_tokens:
+            product_body["max_tokens"] = product_max_tokens
+        requests.append({"custom_id": f"{video_id}:product", "body": product_body})
+
+        videos.append({
+            "video_id": video_id,
+            "video": Path(video_name).stem,
+            "frame_count": len(frames)
+        })
+
+    if not requests:
+        return {"frame_analysis": []}
+
+    batch_id = await openai_service._create_chat_batch(requests)
+    if not batch_id:
+        error_msg = "Failed to submit frame analysis batch"
+        logger.error(error_msg)
+        return {"errors": [error_msg]}
 
+    logger.info(f"[🎞️] Submitted frame analysis batch {batch_id} for {len(videos)} videos")
+    return {"frame_batch": {"batch_id": batch_id, "videos": videos}}
+
+async def _analyze_frames_without_batch(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze the job's frames with synchronous requests after its batch was abandoned."""
+    logger.info("[🎞️] Falling back to synchronous frame analysis")
+    return await analyze_all_frames({**state, "batch_mode": False})
+
+async def collect_frame_batch_results(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    LangGraph-compatible node that waits for a submitted frame analysis batch and
+    converts its results into frame_analysis entries. A no-op when no batch is pending.
+
+    If the batch fails, or does not finish within settings.frame_batch_timeout_minutes,
+    it is cancelled and the frames are analyzed synchronously instead.
+    """
+    frame_batch = state.get("frame_batch")
+    if not frame_batch:
+        return {}
+
+    cancellation_token = state.get("cancellation_token")
+    batch_id = frame_batch["batch_id"]
+    deadline = asyncio.get_running_loop().time() + settings.frame_batch_timeout_minutes * 60
+    poll_errors = 0
+
+    while True:
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            logger.info(f"Job cancelled while waiting for frame analysis batch {batch_id}")
+            await openai_service._cancel_chat_batch(batch_id)
+            return {"errors": ["Job was cancelled"]}
+
+        try:
+            batch_results = await openai_service._get_chat_batch_results(batch_id)
+            poll_errors = 0
+        except ValueError as e:
+            # The batch failed, expired or was cancelled on OpenAI's side
+            logger.error(f"Frame analysis batch {batch_id} failed: {str(e)}")
+            return await _analyze_frames_without_batch(state)
+        except Exception as e:
+            poll_errors += 1
+            logger.warning(f"Error checking frame analysis batch {batch_id} ({poll_errors}/{BATCH_POLL_MAX_ERRORS}): {e}")
+            if poll_errors >= BATCH_POLL_MAX_ERRORS:
+                await openai_service._cancel_chat_batch(batch_id)
+                return await _analyze_frames_without_batch(state)
+            batch_results = None
+
+        if batch_results is not None:
+            break
+
+        if asyncio.get_running_loop().time() >= deadline:
+            logger.warning(f"Frame analysis batch {batch_id} did not finish within {settings.frame_batch_timeout_minutes} minutes")
+            await openai_service._cancel_chat_batch(batch_id)
+            return await _analyze_frames_without_batch(state)
+
+        logger.debug("[⏳] Frame analysis batch %s still running", batch_id)
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+    frame_analysis_results = []
+
+    for video in frame_batch["videos"]:
+        video_id = video["video_id"]
+        analysis = {}
+
+        # Keep track of seen results to avoid duplicates
+        seen_results = set()
+
+        for i in range(video["frame_count"]):
+            result = batch_results.get(f"{video_id}:{i}") or "Error"
+            if result not in seen_results:
+                analysis[f"frame_{i+1}.jpg"] = result
+                seen_results.add(result)
+
+        frame_analysis_results.append({
+            "video_id": video_id,
+            "video": video["video"],
+            "analysis": analysis,
+            "product_info": parse_product_info(batch_results.get(f"{video_id}:product"))
+        })
+
+    logger.info(f"[🎞️] Completed batch frame analysis for {len(frame_analysis_results)} videos")
+    return {"frame_analysis": frame_analysis_results}
@@ -1,13 +1,70 @@
-import os
+import re
+import orjson
+import asyncio
 import logging
-from pathlib import Path
-from typing import Dict, Any
-from app.services.openai_service import openai_service
+from itertools import islice
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.core.cancellation import gather_unless_cancelled
 from app.services.dynamic_prompt_service import dynamic_prompt_service
+from app.services.semantic_cache_service import semantic_cache_service
 
 logger = logging.getLogger(__name__)
 
-async def analyze_transcript_text(text: str, cancellation_token=None) -> str:
+# Maximum number of transcriptions analyzed concurrently
+MAX_CONCURRENT_TRANSCRIPTION_REQUESTS = 20
+_transcription_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTION_REQUESTS)
+
+# Number of transcripts analyzed together in one chat completion
+TRANSCRIPTION_BATCH_SIZE = 8
+# Response budget per transcript in a batch, matching the single-transcript combined prompt
+TRANSCRIPTION_ITEM_MAX_TOKENS = 300
+COMBINED_PROMPT_KEY = "transcription_analyze_and_extract"
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+# Outermost JSON object in a response, tolerating fences or preamble around it
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+# Transcripts shorter than this (e.g. music-only ads) are not worth an API call
+MIN_TRANSCRIPT_LENGTH = 20
+
+# Only the technique analysis may be reused for a near-identical transcript; responses that
+# name the product must come from the transcript itself
+SEMANTIC_PROMPT_KEYS = frozenset({"transcription_analysis"})
+
+async def _cached_transcript_completion(prompt_key: str, text: str, cancellation_token=None, user_id: Optional[str] = None, **override_settings) -> Optional[str]:
+    """
+    Run a transcript prompt through the exact-match response cache. For prompts in
+    SEMANTIC_PROMPT_KEYS, first try the response to a near-identical transcript of the same user.
+    """
+    if prompt_key not in SEMANTIC_PROMPT_KEYS or not user_id:
+        return await dynamic_prompt_service.cached_chat_completion(
+            prompt_key=prompt_key,
+            prompt_variables={"text": text},
+            cancellation_token=cancellation_token,
+            **override_settings
+        )
+
+    namespace = _semantic_namespace(user_id, prompt_key, override_settings.get("model"))
+    cached, embedding = await semantic_cache_service.semantic_lookup(text, namespace, cancellation_token)
+    if cached:
+        return cached
+
+    result = await dynamic_prompt_service.cached_chat_completion(
+        prompt_key=prompt_key,
+        prompt_variables={"text": text},
+        cancellation_token=cancellation_token,
+        **override_settings
+    )
+
+    if result and embedding is not None:
+        await semantic_cache_service.add(text, namespace, embedding, result)
+    return result
+
+def _semantic_namespace(user_id: str, prompt_key: str, model: Optional[str] = None) -> str:
+    """Semantic cache namespace, per user and kept apart per model so fallback retries are not answered from the cache."""
+    return f"{user_id}|{prompt_key}|{model}" if model else f"{user_id}|{prompt_key}"
+
+async def analyze_transcript_text(text: str, cancellation_token=None, user_id: Optional[str] = None) -> str:
     """
     Sends transcription text to GPT for structured analysis using dynamic prompt service.
     Returns a clean bullet list string.
@@ -19,12 +76,7 @@ async def analyze_transcript_text(text: str, cancellation_token=None) -> str:
 
     try:
         # Use dynamic prompt service for transcription analysis
-        prompt_variables = {"text": text}
-        
-        result = await dynamic_prompt_service.make_chat_completion(
-            prompt_key="transcription_analysis",
-            prompt_variables=prompt_variables
-        )
+        result = await _cached_transcript_completion("transcription_analysis", text, cancellation_token, user_id)
         
         return result.strip() if result else None
     except ValueError as e:
@@ -49,28 +101,23 @@ async def extract_product_from_transcript(text: str, cancellation_token=None) ->
         
     try:
         # Use dynamic prompt service for product extraction
-        prompt_variables = {"text": text}
-        
-        result = await dynamic_prompt_service.make_chat_completion(
-            prompt_key="product_extraction_transcript",
-            prompt_variables=prompt_variables
+        result = await _cached_transcript_completion(
+            "product_extraction_transcript",
+            text,
+            cancellation_token,
+            response_format=_JSON_RESPONSE_FORMAT
         )
         
-        if result:
-            try:
-                import json
-                # Clean the result if it has markdown formatting
-                cleaned_result = result.strip().removeprefix("```json").removesuffix("```").strip()
-                product_info = json.loads(cleaned_result)
-                return {
-                    "product": product_info.get("product", ""),
-                    "product_type": product_info.get("product_type", "")
-                }
-            except json.JSONDecodeError:
+        product_info = _load_json(result) if result else None
+        if not isinstance(product_info, dict):
+            if result:
                 logger.warning(f"Failed to parse product JSON: {result}")
-                return {"product": "", "product_type": ""}
-        else:
             return {"product": "", "product_type": ""}
+        
+        return {
+            "product": product_info.get("product", ""),
+            "product_type": product_info.get("product_type", "")
+        }
     except ValueError as e:
         if "cancelled" in str(e).lower():
             logger.info("Product extraction from transcript cancelled")
@@ -82,6 +129,259 @@ async def extract_product_from_transcript(text: str, cancellation_token=None) ->
         logger.error(f"❌ Error extracting product from transcript: {e}", exc_info=True)
         return {"product": "", "product_type": ""}
 
+async def analyze_and_extract(text: str, cancellation_token=None, model: Optional[str] = None) -> Optional[tuple]:
+    """
+    Analyzes the transcription and extracts its product with a single chat completion.
+    Uses the configured transcription analysis model unless another model is given.
+
+    Returns:
+        tuple: (bullet list analysis, product info), or None if the fused prompt is
+        unavailable or the response could not be parsed.
+    """
+    if cancellation_token and cancellation_token.get("cancelled", False):
+        logger.info("Job cancelled before transcription analysis")
+        return None
+
+    result = await _cached_transcript_completion(
+        COMBINED_PROMPT_KEY,
+        text,
+        cancellation_token,
+        model=model or settings.transcription_analysis_model,
+        response_format=_JSON_RESPONSE_FORMAT
+    )
+    if not result:
+        return None
+
+    parsed = _load_json(result)
+    if parsed is None:
+        logger.warning(f"Failed to parse combined transcription JSON: {result}")
+        return None
+
+    combined = _split_combined_result(parsed)
+    if not combined:
+        logger.warning(f"Unexpected combined transcription response: {result}")
+    return combined
+
+def _load_json(result: str) -> Any:
+    """Parse the JSON object in a response. Returns None if there is no valid JSON object."""
+    match = _JSON_OBJECT.search(result)
+    if not match:
+        return None
+    try:
+        return orjson.loads(match.group(0))
+    except orjson.JSONDecodeError:
+        return None
+
+def _split_combined_result(parsed: Any) -> Optional[tuple]:
+    """Split a parsed {analysis, product, product_type} object into (bullet list analysis, product info)."""
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("analysis"), list):
+        return None
+
+    bullets = [str(bullet).strip().lstrip("-• ").strip() for bullet in parsed["analysis"]]
+    bullets = [bullet for bullet in bullets if bullet]
+    analysis_text = "- " + "\n- ".join(bullets) if bullets else ""
+    product_info = {
+        "product": parsed.get("product", ""),
+        "product_type": parsed.get("product_type", "")
+    }
+    return analysis_text, product_info
+
+def _is_confident(analysis_text: str, product_info: dict) -> bool:
+    """Whether an analysis found at least one technique and a product name."""
+    return bool(analysis_text) and bool(product_info.get("product"))
+
+async def analyze_transcript_batch(texts: list, cancellation_token=None) -> Optional[list]:
+    """
+    Analyzes several transcriptions and extracts their products with a single chat completion.
+
+    Returns:
+        list: One parsed {analysis, product, product_type} object per text (None where the
+        response had no usable entry), or None if the request failed or could not be parsed.
+    """
+    transcripts = "\n\n".join(f"[{i}]\n{text}" for i, text in enumerate(texts, start=1))
+    result = await dynamic_prompt_service.make_chat_completion(
+        prompt_key="transcription_batch_analysis",
+        prompt_variables={"count": len(texts), "transcripts": transcripts},
+        cancellation_token=cancellation_token,
+        model=settings.transcription_analysis_model,
+        max_tokens=TRANSCRIPTION_ITEM_MAX_TOKENS * len(texts),
+        response_format=_JSON_RESPONSE_FORMAT
+    )
+    if not result:
+        return None
+
+    parsed = _load_json(result)
+    if parsed is None:
+        logger.warning(f"Failed to parse batch transcription JSON: {result}")
+        return None
+
+    entries = parsed.get("results") if isinstance(parsed, dict) else None
+    if not isinstance(entries, list):
+        logger.warning(f"Unexpected batch transcription response: {result}")
+        return None
+
+    # Match entries back to their transcript by the index the model echoes
+    matched = [None] * len(texts)
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("index", 0)) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(texts) and _split_combined_result(entry):
+            matched[index] = entry
+    return matched
+
+def _is_pending(item: Dict[str, Any], analyzed_video_ids: list) -> bool:
+    """Whether a transcription item is complete and has not been analyzed yet."""
+    if not item.get("video_id") or not item.get("file") or not item.get("text"):
+        logger.warning(f"[⚠️] Missing data in item: {item}")
+        return False
+
+    # Skip if already analyzed
+    if item["video_id"] in analyzed_video_ids:
+        logger.info(f"[⏩] Skipping {item['file']} (already analyzed)")
+        return False
+
+    stripped = item["text"].strip()
+    if len(stripped) < MIN_TRANSCRIPT_LENGTH or not any(c.isalpha() for c in stripped):
+        logger.info(f"[⏩] Skipping {item['file']} (transcript too short to analyze)")
+        return False
+
+    return True
+
+def _transcription_result(item: Dict[str, Any], analysis_text: str, product_info: dict) -> Dict[str, Any]:
+    logger.info(f"[✅] Analyzed transcription and extracted product info: {item['file']}")
+    return {
+        "video_id": item["video_id"],
+        "file": item["file"],
+        "analysis": analysis_text,
+        "product_info": product_info  # Add product information
+    }
+
+async def _process_transcription(item: Dict[str, Any], cancellation_token=None, model: Optional[str] = None, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Analyze a single transcription and extract its product information.
+    Low-confidence answers are retried once with the fallback model.
+
+    Returns:
+        The analysis result for the transcription, or None if it failed or was cancelled.
+    """
+    filename = item["file"]
+    text = item["text"]
+
+    async with _transcription_semaphore:
+        # Check for cancellation before calling OpenAI API
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            logger.info(f"Job cancelled before analyzing transcription {filename}")
+            return None
+
+        logger.info(f"[🧠] Analyzing transcription: {filename}")
+
+        # Analyze and extract the product in one request, falling back to separate requests
+        combined = await analyze_and_extract(text, cancellation_token, model)
+        fallback_model = settings.transcription_fallback_model
+        if (not combined or not _is_confident(*combined)) and model != fallback_model:
+            logger.info(f"[🔁] Retrying analysis of {filename} with {fallback_model}")
+            combined = await analyze_and_extract(text, cancellation_token, fallback_model) or combined
+        if combined:
+            analysis_text, product_info = combined
+        else:
+            if cancellation_token and cancellation_token.get("cancelled", False):
+                logger.info(f"Job cancelled before analyzing transcription {filename}")
+                return None
+
+            analysis_text = await analyze_transcript_text(text, cancellation_token, user_id)
+
+            # Also extract product information from the transcription
+            if cancellation_token and cancellation_token.get("cancelled", False):
+                logger.info(f"Job cancelled before product extraction for {filename}")
+                return None
+
+            product_info = await extract_product_from_transcript(text, cancellation_token)
+
+    if not analysis_text:
+        logger.error(f"Failed to analyze transcription for {filename}")
+        return None
+
+    return _transcription_result(item, analysis_text, product_info)
+
+async def _prepare_transcription_batch(batch: list) -> tuple:
+    """
+    Look a batch of transcriptions up in the exact-match response cache of the
+    single-transcript combined prompt.
+
+    Returns:
+        tuple: (the batch, the cached combined response or None per transcription)
+    """
+    cached = await asyncio.gather(
+        *(dynamic_prompt_service.get_cached_response(
+            COMBINED_PROMPT_KEY, {"text": item["text"]}, model=settings.transcription_analysis_model
+        ) for item in batch)
+    )
+    return batch, cached
+
+async def _process_transcription_batch(batch: list, cached_responses: list, cancellation_token=None, user_id: Optional[str] = None) -> list:
+    """
+    Analyze a prepared batch of transcriptions with one chat completion. Transcripts with a
+    cached analysis are answered from the cache, and transcripts the batch response did not
+    cover are retried one by one.
+
+    Returns:
+        The analysis results for the batch.
+    """
+    results = []
+    retry = []
+    low_confidence = []
+
+    if cancellation_token and cancellation_token.get("cancelled", False):
+        logger.info("Job cancelled before analyzing transcription batch")
+        return []
+
+    misses = []
+    for item, cached in zip(batch, cached_responses):
+        combined = _split_combined_result(_load_json(cached)) if cached else None
+        if combined and _is_confident(*combined):
+            results.append(_transcription_result(item, *combined))
+        elif combined:
+            low_confidence.append(item)
+        else:
+            misses.append(item)
+
+    if misses:
+        logger.info(f"[🧠] Analyzing {len(misses)} transcriptions in one request")
+        async with _transcription_semaphore:
+            entries = await analyze_transcript_batch([item["text"] for item in misses], cancellation_token) or [None] * len(misses)
+
+        for item, entry in zip(misses, entries):
+            if not entry:
+                retry.append(item)
+                continue
+            # Cache each entry as that transcript's own combined response, so it is exact-match only
+            await dynamic_prompt_service.cache_response(
+                COMBINED_PROMPT_KEY,
+                {"text": item["text"]},
+                orjson.dumps({key: entry.get(key) for key in ("analysis", "product", "product_type")}).decode(),
+                model=settings.transcription_analysis_model
+            )
+            combined = _split_combined_result(entry)
+            if _is_confident(*combined):
+                results.append(_transcription_result(item, *combined))
+            else:
+                low_confidence.append(item)
+
+    # Fall back to per-item requests, they acquire the semaphore themselves
+    if retry or low_confidence:
+        logger.warning(f"[⚠️] Retrying {len(retry)} missed and {len(low_confidence)} low-confidence transcriptions individually")
+        outcomes = await asyncio.gather(
+            *(_process_transcription(item, cancellation_token, user_id=user_id) for item in retry),
+            *(_process_transcription(item, cancellation_token, settings.transcription_fallback_model, user_id) for item in low_confidence)
+        )
+        results.extend(outcome for outcome in outcomes if outcome)
+
+    return results
+
 async def analyze_all_transcriptions(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     LangGraph-compatible node that analyzes each transcription and returns results in memory only.
@@ -92,7 +392,6 @@ async def analyze_all_transcriptions(state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Job cancelled during analyze_all_transcriptions")
         return {"errors": ["Job was cancelled"]}
     
-    results = []
     transcriptions = state.get("transcriptions", [])
     user_id = state.get("user_id")
     analyzed_video_ids = state.get("analyzed_video_ids", [])
@@ -108,57 +407,53 @@ async def analyze_all_transcriptions(state: Dict[str, Any]) -> Dict[str, Any]:
 
     logger.info(f"[🧠] Starting analysis of {len(transcriptions)} transcriptions...")
 
-    for i, item in enumerate(transcriptions):
+    # Analyze each distinct transcript once; re-uploads of the same ad share its result
+    items_by_text = {}
+    for item in transcriptions:
+        if _is_pending(item, analyzed_video_ids):
+            items_by_text.setdefault(item["text"], []).append(item)
+
+    pending = iter([items[0] for items in items_by_text.values()])
+    batches = list(iter(lambda: list(islice(pending, TRANSCRIPTION_BATCH_SIZE)), []))
+
+    # Pipeline the batches: a producer cache-checks the next batches while workers
+    # wait on the OpenAI calls for earlier ones, with the bounded queue providing backpressure
+    workers = max(1, min(MAX_CONCURRENT_TRANSCRIPTION_REQUESTS, len(batches)))
+    prepared_batches = asyncio.Queue(maxsize=2 * workers)
+    results = []
+
+    async def produce():
         try:
-            # Check for cancellation before each transcription analysis
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled during transcription analysis (item {i+1}/{len(transcriptions)})")
-                return {"errors": ["Job was cancelled"]}
-            
-            video_id = item.get("video_id")
-            filename = item.get("file")
-            text = item.get("text")
-
-            if not video_id or not filename or not text:
-                logger.warning(f"[⚠️] Missing data in item: {item}")
-                continue
+            for batch in batches:
+                await prepared_batches.put(await _prepare_transcription_batch(batch))
+        finally:
+            for _ in range(workers):
+                await prepared_batches.put(None)
 
-            # Skip if already analyzed
-            if video_id in analyzed_video_ids:
-                logger.info(f"[⏩] Skipping {filename} (already analyzed)")
-                continue
+    async def consume():
+        while (prepared := await prepared_batches.get()) is not None:
+            batch, cached_responses = prepared
+            try:
+                results.extend(await _process_transcription_batch(batch, cached_responses, cancellation_token, user_id))
+            except Exception as e:
+                files = ", ".join(item["file"] for item in batch)
+                logger.error(f"Error processing transcriptions {files}: {str(e)}", exc_info=True)
 
-            logger.info(f"[🧠] Analyzing transcription: {filename}")
-            
-            # Check for cancellation before calling OpenAI API
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled before analyzing transcription {filename}")
-                return {"errors": ["Job was cancelled"]}
-            
-            analysis_text = await analyze_transcript_text(text, cancellation_token)
-            
-            # Also extract product information from the transcription
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled before product extraction for {filename}")
-                return {"errors": ["Job was cancelled"]}
-            
-            product_info = await extract_product_from_transcript(text, cancellation_token)
+    # In-flight requests are cancelled as soon as the job is
+    completed = await gather_unless_cancelled(
+        [produce(), *(consume() for _ in range(workers))],
+        cancellation_token
+    )
 
-            if analysis_text:
-                results.append({
-                    "video_id": video_id,
-                    "file": filename,
-                    "analysis": analysis_text,
-                    "product_info": product_info  # Add product information
-                })
-                logger.info(f"[✅] Analyzed transcription and extracted product info: {filename}")
-            else:
-                error_msg = f"Failed to analyze transcription for {filename}"
-                logger.error(error_msg)
+    if completed is None or (cancellation_token and cancellation_token.get("cancelled", False)):
+        logger.info("Job cancelled during transcription analysis")
+        return {"errors": ["Job was cancelled"]}
 
-        except Exception as e:
-            error_msg = f"Error processing transcription {item.get('file', 'unknown')}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+    duplicates = {items[0]["video_id"]: items[1:] for items in items_by_text.values()}
+    for result in list(results):
+        for duplicate in duplicates.get(result["video_id"], []):
+            logger.info(f"[♻️] Reusing analysis of {result['file']} for identical transcript {duplicate['file']}")
+            results.append({**result, "video_id": duplicate["video_id"], "file": duplicate["file"]})
 
     logger.info(f"[🧠] Completed analysis of {len(results)} transcriptions")
     return {"transcription_analysis": results}
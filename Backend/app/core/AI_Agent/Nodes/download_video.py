@@ -1,14 +1,55 @@
 import os
 import httpx
+import asyncio
 import logging
+import urllib.error
+from functools import lru_cache
+from urllib.request import urlopen
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from app.core.cancellation import CancellationToken
 
 logger = logging.getLogger(__name__)
 
+# Backend directory (4 levels up from this file), resolved once at import
+# Current: Backend/app/core/AI_Agent/Nodes/download_video.py
+# Target:  Backend/
+BACKEND_DIR = Path(__file__).resolve().parents[4]
+
+# Maximum number of videos downloaded concurrently
+MAX_CONCURRENT_DOWNLOADS = 8
+_download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+# Bytes per streamed chunk; large enough to amortize per-chunk overhead and write syscalls
+CHUNK_SIZE = 256 * 1024
+# Chunks are buffered and written from a worker thread once this many bytes accumulate
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Shared HTTP client, so connections and TLS sessions to the CDN are reused across runs
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(60.0, connect=10.0)  # Longer timeout for video downloads
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared download client on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+@lru_cache(maxsize=128)
 def get_user_video_dir(user_id: str) -> Path:
     """
     Create and return user-specific video directory outside the app folder.
+    The directory is created once per user per process.
     
     Args:
         user_id (str): The user ID
@@ -16,13 +57,8 @@ def get_user_video_dir(user_id: str) -> Path:
     Returns:
         Path: User-specific video directory path
     """
-    # Get the Backend directory (4 levels up from current file)
-    # Current: Backend/app/core/AI_Agent/Nodes/download_video.py
-    # Target:  Backend/
-    backend_dir = Path(__file__).resolve().parent.parent.parent.parent.parent
-    
     # Create user-specific video directory: Backend/videos_<user_id>/
-    user_video_dir = backend_dir / f"videos_{user_id}"
+    user_video_dir = BACKEND_DIR / f"videos_{user_id}"
     user_video_dir.mkdir(exist_ok=True)
     
     logger.info(f"[📁] Using video directory: {user_video_dir}")
@@ -30,11 +66,174 @@ def get_user_video_dir(user_id: str) -> Path:
 
 def is_valid_mp4(file_path: Path) -> bool:
     """Check if the file exists and is a non-zero MP4 file."""
-    return file_path.exists() and file_path.stat().st_size > 0 and file_path.suffix == ".mp4"
+    if file_path.suffix != ".mp4":
+        return False
+    try:
+        return os.stat(file_path).st_size > 0
+    except OSError:
+        return False
+
+def _urllib_copy(url: str, filename: Path, is_cancelled: Callable[[], bool]) -> bool:
+    """
+    Copy a URL to disk with urllib in the calling (worker) thread, avoiding httpx's per-chunk overhead.
+
+    Returns:
+        bool: True if the copy completed, False if the job was cancelled part way.
+    """
+    with urlopen(url, timeout=30.0) as response, open(filename, "wb") as f:
+        while chunk := response.read(WRITE_BUFFER_SIZE):
+            if is_cancelled():
+                return False
+            f.write(chunk)
+    return True
+
+def _write_chunks(fd: int, chunks: list) -> None:
+    """Write chunks to a file descriptor with os.writev, resuming after short writes."""
+    views = [memoryview(chunk) for chunk in chunks]
+    while views:
+        written = os.writev(fd, views)
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if views and written:
+            views[0] = views[0][written:]
+
+async def _stream_download(client: httpx.AsyncClient, url: str, filename: Path, is_cancelled: Callable[[], bool]) -> bool:
+    """
+    Stream a URL to disk through httpx.
+
+    Returns:
+        bool: True if the download completed, False if the job was cancelled part way.
+    """
+    async with client.stream("GET", url, timeout=30.0) as response:
+        response.raise_for_status()
+
+        # Collect chunks and write them with one vectored write off the event loop,
+        # so concurrent downloads aren't stalled and chunks aren't copied into a buffer
+        pending, pending_bytes = [], 0
+        with open(filename, "wb", buffering=0) as f:
+            fd = f.fileno()
+            async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
+                # Check for cancellation every chunk (256KB) for responsiveness
+                if is_cancelled():
+                    return False
+
+                pending.append(chunk)
+                pending_bytes += len(chunk)
+                if pending_bytes >= WRITE_BUFFER_SIZE:
+                    await asyncio.to_thread(_write_chunks, fd, pending)
+                    pending, pending_bytes = [], 0
+
+            if pending:
+                await asyncio.to_thread(_write_chunks, fd, pending)
+    return True
+
+async def _download_one(client: httpx.AsyncClient, video: Dict[str, Any], user_video_dir: Path, cached_sizes: Dict[str, int], is_cancelled: Callable[[], bool]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Download a single video unless it is already present in the user's folder.
+
+    Returns:
+        tuple: (saved path or None, error message or None). Both are None when the video
+        was skipped or the job was cancelled.
+    """
+    video_id = video.get("video_id")
+    source_url = video.get("source")
+
+    if not video_id or not source_url:
+        logger.debug(f"[SKIP] Missing data: video_id={video_id}, source_url={source_url}")
+        return None, None
+
+    # Skip if there was an error getting the video URL
+    if "error" in video:
+        logger.warning(f"[SKIP] Video {video_id} had error: {video['error']}")
+        return None, None
+
+    # Use user-specific directory for filename
+    filename = user_video_dir / f"video_{video_id}.mp4"
+
+    # --- Skip if already downloaded ---
+    if cached_sizes.get(filename.name, 0) > 0:
+        logger.info(f"[✅] Video already exists, skipping download: {filename.name}")
+        return str(filename), None
+
+    # --- Download if not cached ---
+    async with _download_semaphore:
+        # Check for cancellation before starting HTTP request
+        if is_cancelled():
+            logger.info(f"Job cancelled before starting download of {video_id}")
+            return None, None
+
+        completed = False
+        try:
+            logger.info(f"[📥] Downloading video {video_id} to {user_video_dir.name}...")
+
+            # Fast path: resolve redirects with httpx, then copy the final CDN URL with urllib in a thread
+            try:
+                head = await client.head(source_url, follow_redirects=True, timeout=30.0)
+                head.raise_for_status()
+                final_url = str(head.url)
+            except httpx.HTTPError as e:
+                logger.debug(f"HEAD request failed for {video_id}, streaming with httpx instead: {e}")
+                final_url = None
+
+            if final_url:
+                finished = await asyncio.to_thread(_urllib_copy, final_url, filename, is_cancelled)
+            else:
+                finished = await _stream_download(client, source_url, filename, is_cancelled)
+
+            if not finished:
+                logger.info(f"Job cancelled during video download of {video_id}")
+                return None, None
+
+            # Final cancellation check after download
+            if is_cancelled():
+                logger.info(f"Job cancelled after downloading {video_id}")
+                return None, None
+
+            # Verify the download
+            if not is_valid_mp4(filename):
+                logger.error(f"[❌] Downloaded file is invalid: {filename}")
+                return None, f"Downloaded file is invalid for video_id={video_id}"
+
+            completed = True
+            logger.info(f"[💾] Successfully downloaded: {filename.name}")
+            return str(filename), None
+
+        except httpx.TimeoutException:
+            # Check if this was due to cancellation
+            if is_cancelled():
+                logger.info(f"Download timeout for {video_id} - job was cancelled")
+                return None, None
+            error_msg = f"Timeout downloading video_id={video_id}"
+            logger.error(error_msg)
+            return None, error_msg
+        except httpx.HTTPStatusError as e:
+            error_msg = f"HTTP error downloading video_id={video_id}: {e.response.status_code}"
+            logger.error(error_msg)
+            return None, error_msg
+        except urllib.error.HTTPError as e:
+            error_msg = f"HTTP error downloading video_id={video_id}: {e.code}"
+            logger.error(error_msg)
+            return None, error_msg
+        except (httpx.RequestError, urllib.error.URLError) as e:
+            error_msg = f"Request error downloading video_id={video_id}: {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg
+        except Exception as e:
+            error_msg = f"Unexpected error downloading video_id={video_id}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return None, error_msg
+        finally:
+            # Clean up partial, invalid or cancelled downloads
+            if not completed and filename.exists():
+                filename.unlink()
+                logger.info(f"Cleaned up partial download: {filename}")
 
 async def download_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Downloads Facebook ad videos only if not already present in user-specific folder.
+    Each saved path is also put on every queue in the state's 'download_queues' as soon as it
+    is ready, and 'downloads_done' is set when the node finishes, however it exits.
     
     Args:
         state (dict): LangGraph state, must include 'video_urls' and 'user_id'.
@@ -42,9 +241,42 @@ async def download_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         dict: Updated state with 'downloaded_videos'.
     """
+    downloads_done = state.get("downloads_done")
+    try:
+        return await _download_videos(state, list((state.get("download_queues") or {}).values()))
+    finally:
+        if downloads_done is not None:
+            downloads_done.set()
+
+async def iter_downloads(download_queue: asyncio.Queue, downloads_done: asyncio.Event, cancellation_token=None):
+    """
+    Yield video paths from a download queue as Download Video saves them, until it has
+    finished and the queue is drained. Stops early when the job is cancelled.
+    """
+    while not (downloads_done.is_set() and download_queue.empty()):
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            return
+
+        try:
+            yield Path(await asyncio.wait_for(download_queue.get(), timeout=1.0))
+        except asyncio.TimeoutError:
+            continue
+
+async def _download_videos(state: Dict[str, Any], download_queues: List[asyncio.Queue]) -> Dict[str, Any]:
     # Check for cancellation at the start (both mechanisms)
     cancellation_token = state.get("cancellation_token")
-    if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
+
+    if isinstance(cancellation_token, CancellationToken):
+        # Test the token's event directly; this runs for every downloaded chunk
+        token_cancelled = cancellation_token.is_set
+    else:
+        token = cancellation_token or {}
+        token_cancelled = lambda: token.get("cancelled", False)
+
+    def is_cancelled() -> bool:
+        return token_cancelled() or state.get("cancelled", False)
+
+    if is_cancelled():
         logger.info("Job cancelled during download_videos")
         return {"errors": ["Job was cancelled"]}
     
@@ -52,6 +284,7 @@ async def download_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     user_id = state.get("user_id")
     progress_callback = state.get("progress_callback")
     saved_paths = []
+    errors = []
 
     if not video_list:
         logger.warning("[⚠️] No video URLs in state. Skipping download.")
@@ -68,125 +301,42 @@ async def download_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     if progress_callback:
         await progress_callback(50, f"Starting video downloads ({len(video_list)} videos)...")
 
-    async with httpx.AsyncClient(timeout=60.0) as client:  # Longer timeout for video downloads
-        for i, video in enumerate(video_list):
-            # Check for cancellation before each video download (both mechanisms)
-            if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                logger.info(f"Job cancelled during video download (video {i+1}/{len(video_list)})")
-                return {"errors": ["Job was cancelled"]}
-            
-            video_id = video.get("video_id")
-            source_url = video.get("source")
-
-            if not video_id or not source_url:
-                logger.debug(f"[SKIP] Missing data: video_id={video_id}, source_url={source_url}")
-                continue
-
-            # Skip if there was an error getting the video URL
-            if "error" in video:
-                logger.warning(f"[SKIP] Video {video_id} had error: {video['error']}")
-                continue
-
-            # Use user-specific directory for filename
-            filename = user_video_dir / f"video_{video_id}.mp4"
-
-            # --- Skip if already downloaded ---
-            if is_valid_mp4(filename):
-                logger.info(f"[✅] Video already exists, skipping download: {filename.name}")
-                saved_paths.append(str(filename))
-                
-                # Report progress for skipped videos too
-                if progress_callback:
-                    download_progress = 50 + (i + 1) / len(video_list) * 25  # 50-75% range
-                    await progress_callback(int(download_progress), f"Video {i + 1}/{len(video_list)} (cached)")
-                continue
-
-            # --- Download if not cached ---
-            try:
-                logger.info(f"[📥] Downloading video {video_id} to {user_video_dir.name}...")
-                
-                if progress_callback:
-                    download_progress = 50 + i / len(video_list) * 25  # 50-75% range
-                    await progress_callback(int(download_progress), f"Downloading video {i + 1}/{len(video_list)}...")
-                
-                # Check for cancellation before starting HTTP request (both mechanisms)
-                if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                    logger.info(f"Job cancelled before starting download of {video_id}")
-                    return {"errors": ["Job was cancelled"]}
-                
-                response = await client.get(source_url, timeout=30.0)
-                response.raise_for_status()
-
-                # Check for cancellation after getting response but before writing (both mechanisms)
-                if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                    logger.info(f"Job cancelled after getting response for {video_id}")
-                    return {"errors": ["Job was cancelled"]}
-
-                chunk_count = 0
-                with open(filename, "wb") as f:
-                    async for chunk in response.aiter_bytes(chunk_size=8192):
-                        chunk_count += 1
-                        
-                        # Check for cancellation every 5 chunks (roughly every 40KB) for more responsiveness
-                        if chunk_count % 5 == 0:
-                            if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                                logger.info(f"Job cancelled during video download of {video_id} (chunk {chunk_count})")
-                                # Clean up partial file
-                                if filename.exists():
-                                    filename.unlink()
-                                    logger.info(f"Cleaned up partial download: {filename}")
-                                return {"errors": ["Job was cancelled"]}
-                        
-                        f.write(chunk)
-
-                # Final cancellation check after download (both mechanisms)
-                if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                    logger.info(f"Job cancelled after downloading {video_id}")
-                    # Clean up the file since job was cancelled
-                    if filename.exists():
-                        filename.unlink()
-                        logger.info(f"Cleaned up downloaded file: {filename}")
-                    return {"errors": ["Job was cancelled"]}
-
-                # Verify the download
-                if is_valid_mp4(filename):
-                    logger.info(f"[💾] Successfully downloaded: {filename.name}")
-                    saved_paths.append(str(filename))
-                    
-                    if progress_callback:
-                        download_progress = 50 + (i + 1) / len(video_list) * 25  # 50-75% range
-                        await progress_callback(int(download_progress), f"Downloaded video {i + 1}/{len(video_list)}")
-                else:
-                    logger.error(f"[❌] Downloaded file is invalid: {filename}")
-                    # Clean up invalid file
-                    if filename.exists():
-                        filename.unlink()
-
-            except httpx.TimeoutException:
-                # Check if this was due to cancellation (both mechanisms)
-                if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                    logger.info(f"Download timeout for {video_id} - job was cancelled")
-                    return {"errors": ["Job was cancelled"]}
-                else:
-                    error_msg = f"Timeout downloading video_id={video_id}"
-                    logger.error(error_msg)
-                    return {"errors": [error_msg]}
-            except httpx.HTTPStatusError as e:
-                error_msg = f"HTTP error downloading video_id={video_id}: {e.response.status_code}"
-                logger.error(error_msg)
-                return {"errors": [error_msg]}
-            except httpx.RequestError as e:
-                error_msg = f"Request error downloading video_id={video_id}: {str(e)}"
-                logger.error(error_msg)
-                return {"errors": [error_msg]}
-            except Exception as e:
-                error_msg = f"Unexpected error downloading video_id={video_id}: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                return {"errors": [error_msg]}
+    client = _get_http_client()
+
+    # Scan the directory once for cached MP4 sizes instead of probing every video's file
+    with os.scandir(user_video_dir) as entries:
+        cached_sizes = {
+            entry.name: entry.stat().st_size
+            for entry in entries
+            if entry.name.endswith(".mp4") and entry.is_file()
+        }
+
+    # Download all videos concurrently, bounded by _download_semaphore
+    downloads = [_download_one(client, video, user_video_dir, cached_sizes, is_cancelled) for video in video_list]
+
+    for completed_count, download in enumerate(asyncio.as_completed(downloads), start=1):
+        path, error = await download
+        if path:
+            saved_paths.append(path)
+            for download_queue in download_queues:
+                download_queue.put_nowait(path)
+        if error:
+            errors.append(error)
+
+        if progress_callback:
+            download_progress = 50 + completed_count / len(video_list) * 25  # 50-75% range
+            await progress_callback(int(download_progress), f"Processed video {completed_count}/{len(video_list)}")
+
+    if is_cancelled():
+        logger.info("Job cancelled during video download")
+        return {"errors": ["Job was cancelled"]}
 
     logger.info(f"[📁] Processed {len(saved_paths)} videos in user directory: {user_video_dir.name}")
     
     if progress_callback:
         await progress_callback(75, f"Completed video downloads ({len(saved_paths)} videos)")
     
-    return {"downloaded_videos": saved_paths}
+    result = {"downloaded_videos": saved_paths}
+    if errors:
+        result["errors"] = errors
+    return result
@@ -1,24 +1,92 @@
+import os
 import cv2
-import base64
+import asyncio
+import multiprocessing
+import shutil
+import pybase64
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.core.cancellation import gather_unless_cancelled
+from .download_video import iter_downloads
 
 logger = logging.getLogger(__name__)
 
+# JPEG quality for extracted frames; the vision model sees no difference from the default 95
+FRAME_JPEG_QUALITY = 80
+
+# Quality scale for frames encoded by ffmpeg (2-31, lower is better); 5 is close to FRAME_JPEG_QUALITY
+FFMPEG_JPEG_QSCALE = 5
+# ffmpeg binary used to select and encode frames in a single subprocess, if installed
+FFMPEG_PATH = shutil.which("ffmpeg")
+_ffmpeg_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+
+# Worker processes for the CPU-bound decode and JPEG encode, created by start_frame_pool() at
+# application startup. They are spawned rather than forked: forking the running server would copy
+# its heap and could inherit locks held by its event loop, driver and executor threads.
+_frame_pool: Optional[ProcessPoolExecutor] = None
+
+def start_frame_pool():
+    """Create the frame extraction worker pool on application startup."""
+    global _frame_pool
+    if _frame_pool is None:
+        _frame_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+def _get_frame_pool() -> ProcessPoolExecutor:
+    # Only needed when the nodes run outside the app, e.g. from a script
+    start_frame_pool()
+    return _frame_pool
+
+# Encoder thread inside each worker process; cv2.imencode releases the GIL, so JPEG
+# encoding of one frame overlaps decoding of the next
+_encode_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_encode_executor() -> ThreadPoolExecutor:
+    global _encode_executor
+    if _encode_executor is None:
+        _encode_executor = ThreadPoolExecutor(max_workers=2)
+    return _encode_executor
+
+def shutdown_frame_pool():
+    """Stop the frame extraction worker processes on application shutdown."""
+    global _frame_pool
+    if _frame_pool is not None:
+        _frame_pool.shutdown(cancel_futures=True)
+        _frame_pool = None
+
 def convert_frame_to_base64(frame):
     """Converts an OpenCV frame to Base64-encoded string."""
-    ret, buffer = cv2.imencode('.jpg', frame)
+    ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), FRAME_JPEG_QUALITY])
     if not ret:
         return None
-    return base64.b64encode(buffer).decode('utf-8')
+    return pybase64.b64encode_as_string(buffer)
+
+def _open_capture(video_path: Path) -> cv2.VideoCapture:
+    """
+    Open a video with hardware-accelerated decoding (CUDA, VAAPI, D3D11, ...) when OpenCV
+    and the host support it. OpenCV falls back to software decoding when no device is available.
+    """
+    if hasattr(cv2, "VIDEO_ACCELERATION_ANY"):
+        capture = cv2.VideoCapture(
+            str(video_path),
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        )
+        if capture.isOpened():
+            return capture
+        capture.release()
+    return cv2.VideoCapture(str(video_path))
 
 def extract_evenly_distributed_frames_from_video(video_path: Path, max_frames: int = 5) -> list[str]:
     """
     Extracts up to `max_frames` evenly distributed frames from a video.
     Returns a list of Base64-encoded JPEG images.
     """
-    capture = cv2.VideoCapture(str(video_path))
+    capture = _open_capture(video_path)
     total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
 
     if total_frames == 0:
@@ -27,31 +95,114 @@ def extract_evenly_distributed_frames_from_video(video_path: Path, max_frames: i
         return []
 
     step = max(1, total_frames // max_frames)
-    base64_frames = []
+    last_target = range(0, total_frames, step)[:max_frames][-1]
+    encoder = _get_encode_executor()
+    encodings = []
 
     try:
-        for i in range(0, total_frames, step):
-            capture.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = capture.read()
+        # Scan forward once instead of seeking, which resets the decoder and re-decodes from
+        # the previous keyframe every time; skipped frames are grabbed without colour conversion
+        for i in range(last_target + 1):
+            if not capture.grab():
+                break
+            if i % step:
+                continue
 
+            ret, frame = capture.retrieve()
             if ret:
-                frame_b64 = convert_frame_to_base64(frame)
-                if frame_b64:
-                    base64_frames.append(frame_b64)
-
-            if len(base64_frames) >= max_frames:
-                break
+                encodings.append(encoder.submit(convert_frame_to_base64, frame))
 
     except Exception as e:
         logger.error(f"Error extracting frames from {video_path.name}: {e}", exc_info=True)
     finally:
         capture.release()
 
+    base64_frames = []
+    for encoding in encodings:
+        try:
+            frame_b64 = encoding.result()
+        except Exception as e:
+            logger.error(f"Error encoding frame from {video_path.name}: {e}", exc_info=True)
+            continue
+        if frame_b64:
+            base64_frames.append(frame_b64)
+
     return base64_frames
 
+def _count_frames(video_path: Path) -> int:
+    """Read the frame count from the container header without decoding."""
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        return int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+def _split_mjpeg_stream(data: bytes) -> list[bytes]:
+    """Split ffmpeg's image2pipe MJPEG output into individual JPEG images."""
+    images = []
+    start = data.find(b"\xff\xd8")
+    while start != -1:
+        end = data.find(b"\xff\xd9", start + 2)
+        if end == -1:
+            break
+        images.append(data[start:end + 2])
+        start = data.find(b"\xff\xd8", end + 2)
+    return images
+
+async def _extract_frames_with_ffmpeg(video_path: Path, max_frames: int = 5) -> Optional[list[str]]:
+    """
+    Extract up to `max_frames` evenly distributed frames with one ffmpeg process, which
+    demuxes, decodes, selects and JPEG-encodes without Python touching each frame.
+
+    Returns:
+        list: Base64-encoded JPEG images, or None if ffmpeg failed and OpenCV should be used.
+    """
+    total_frames = await asyncio.to_thread(_count_frames, video_path)
+    if total_frames == 0:
+        logger.warning(f"[⚠️] No frames in video: {video_path.name}")
+        return []
+
+    step = max(1, total_frames // max_frames)
+
+    async with _ffmpeg_semaphore:
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, "-loglevel", "error", "-i", str(video_path),
+            "-vf", f"select='not(mod(n\\,{step}))'", "-vsync", "vfr",
+            "-frames:v", str(max_frames), "-q:v", str(FFMPEG_JPEG_QSCALE),
+            "-f", "image2pipe", "-vcodec", "mjpeg", "pipe:1",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+    if process.returncode != 0:
+        logger.warning(f"ffmpeg frame extraction failed for {video_path.name}: {stderr.decode(errors='replace').strip()}")
+        return None
+
+    return [pybase64.b64encode_as_string(image) for image in _split_mjpeg_stream(stdout)]
+
+async def _extract_video_frames(video_path: Path) -> list[str]:
+    """Extract frames with ffmpeg when available, falling back to OpenCV in the worker pool."""
+    if FFMPEG_PATH:
+        frames = await _extract_frames_with_ffmpeg(video_path)
+        if frames is not None:
+            return frames
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_frame_pool(), extract_evenly_distributed_frames_from_video, video_path)
+
 async def extract_all_videos_as_base64_frames(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     LangGraph-compatible node to extract frames from all videos and return frames in memory only.
+
+    When the state carries a download queue, this node runs alongside Download Video and starts
+    extracting each video's frames as soon as it is downloaded; otherwise it extracts from the
+    downloaded_videos list.
     """
     # Check for cancellation at the start
     cancellation_token = state.get("cancellation_token")
@@ -62,9 +213,12 @@ async def extract_all_videos_as_base64_frames(state: Dict[str, Any]) -> Dict[str
     results = []
     video_paths = state.get("downloaded_videos", [])
     user_id = state.get("user_id")
-    analyzed_video_ids = state.get("analyzed_video_ids", [])
+    analyzed_video_ids = set(state.get("analyzed_video_ids", []))
+    download_queue = (state.get("download_queues") or {}).get("extract_frames")
+    downloads_done = state.get("downloads_done")
+    pipelined = download_queue is not None and downloads_done is not None
 
-    if not video_paths:
+    if not pipelined and not video_paths:
         logger.warning("[⚠️] No video paths found in state. Skipping frame extraction.")
         return {"extracted_frames": []}
     
@@ -73,48 +227,61 @@ async def extract_all_videos_as_base64_frames(state: Dict[str, Any]) -> Dict[str
         logger.error(error_msg)
         return {"errors": [error_msg]}
 
-    logger.info(f"[📽️] Starting frame extraction from {len(video_paths)} videos...")
+    if pipelined:
+        logger.info("[📽️] Extracting frames from videos as they are downloaded...")
+    else:
+        logger.info(f"[📽️] Starting frame extraction from {len(video_paths)} videos...")
 
-    for i, video_file in enumerate(video_paths):
-        try:
-            # Check for cancellation before each video
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled during frame extraction (video {i+1}/{len(video_paths)})")
-                return {"errors": ["Job was cancelled"]}
-            
-            video_file = Path(video_file)
-            
-            # Extract video ID from filename (assuming format: video_{id}.mp4)
-            video_id = video_file.stem.replace("video_", "")
-            
-            # Skip if already analyzed
-            if video_id in analyzed_video_ids:
-                logger.info(f"[⏩] Skipping {video_file.name} (already analyzed)")
-                continue
+    pending = []
+    tasks = []
 
-            logger.info(f"[📽️] Extracting frames from {video_file.name}")
-            
-            # Check for cancellation before starting frame extraction
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled before extracting frames from {video_file.name}")
-                return {"errors": ["Job was cancelled"]}
-            
-            frames_b64 = extract_evenly_distributed_frames_from_video(video_file)
-
-            if frames_b64:
-                results.append({
-                    "video_id": video_id,
-                    "video": video_file.name,
-                    "frames": frames_b64
-                })
-                logger.info(f"[✅] Extracted {len(frames_b64)} frames from {video_file.name}")
-            else:
-                error_msg = f"No frames extracted from {video_file.name}"
-                logger.warning(error_msg)
+    def submit(video_file: Path):
+        # Extract video ID from filename (assuming format: video_{id}.mp4)
+        video_id = video_file.stem.replace("video_", "")
+        
+        # Skip if already analyzed
+        if video_id in analyzed_video_ids:
+            logger.info(f"[⏩] Skipping {video_file.name} (already analyzed)")
+            return
+        
+        pending.append((video_id, video_file))
+        tasks.append(asyncio.ensure_future(_extract_video_frames(video_file)))
 
-        except Exception as e:
-            error_msg = f"Error processing video {video_file}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+    if pipelined:
+        # Start each extraction as soon as its download lands
+        async for video_file in iter_downloads(download_queue, downloads_done, cancellation_token):
+            submit(video_file)
+
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            for task in tasks:
+                task.cancel()
+            logger.info("Job cancelled while waiting for downloads to extract frames from")
+            return {"errors": ["Job was cancelled"]}
+    else:
+        for video_file in map(Path, video_paths):
+            submit(video_file)
+
+    # Decode and encode the videos in parallel ffmpeg subprocesses or worker processes, off the event loop
+    outcomes = await gather_unless_cancelled(tasks, cancellation_token, return_exceptions=True)
+
+    if outcomes is None or (cancellation_token and cancellation_token.get("cancelled", False)):
+        logger.info("Job cancelled during frame extraction")
+        return {"errors": ["Job was cancelled"]}
+
+    for (video_id, video_file), frames_b64 in zip(pending, outcomes):
+        if isinstance(frames_b64, Exception):
+            error_msg = f"Error processing video {video_file}: {str(frames_b64)}"
+            logger.error(error_msg, exc_info=frames_b64)
+        elif frames_b64:
+            results.append({
+                "video_id": video_id,
+                "video": video_file.name,
+                "frames": frames_b64
+            })
+            logger.info(f"[✅] Extracted {len(frames_b64)} frames from {video_file.name}")
+        else:
+            error_msg = f"No frames extracted from {video_file.name}"
+            logger.warning(error_msg)
 
     logger.info(f"[📽️] Completed frame extraction from {len(results)} videos")
     return {"extracted_frames": results}
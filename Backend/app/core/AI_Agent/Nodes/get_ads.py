@@ -1,14 +1,23 @@
+import json
 import logging
 from typing import Dict, Any, List
 from app.services.facebook_service import FacebookAdService
-from datetime import datetime, timedelta
 from app.core.database import get_database
 
 logger = logging.getLogger(__name__)
 
+# Ad fields requested from the Graph API, joined once at import. Insights are not requested:
+# the analysis graph only uses the creative, campaign and adset data, and insights made up
+# most of each page. Metrics are collected separately by the metrics service.
+_AD_FIELDS = ",".join((
+    "id", "name", "campaign_id", "campaign{name}", "adset_id", "adset{name,targeting}",
+    "creative{id,video_id,effective_object_story_id,object_story_spec}", "status", "effective_status"
+))
+_ACTIVE_ADS_FILTER = json.dumps([{"field": "effective_status", "operator": "IN", "value": ["ACTIVE"]}])
+
 async def get_ads_from_facebook(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Fetches active ads and insights from Facebook API for analysis.
+    Fetches active ads from Facebook API for analysis.
 
     Args:
         state (dict): Current LangGraph state containing access_token, account_id, and user_id.
@@ -42,22 +51,16 @@ async def get_ads_from_facebook(state: Dict[str, Any]) -> Dict[str, Any]:
         fb_service = FacebookAdService(access_token=access_token, account_id=account_id)
         
         try:
-            # Prepare API URL and parameters for ads with insights
-            url = f"{fb_service.base_url}/act_{account_id}/ads"
-            
-            # Calculate date range (yesterday to today)
-            end_date = datetime.utcnow().strftime('%Y-%m-%d')
-            start_date = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
-            
             # Check for cancellation before making API request (both mechanisms)
             if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
                 logger.info("Job cancelled before Facebook API request")
                 return {"errors": ["Job was cancelled"]}
 
             # Make the API request with cancellation token
-            # Note: We'll filter for active ads in code since Facebook API doesn't support effective_status parameter directly
+            # Only active ads are requested, so every page of 100 is 100 ads to analyze
             params = {
-                "fields": "id,name,campaign_id,campaign{name},adset_id,adset{name,targeting},creative{id,video_id,effective_object_story_id,object_story_spec},status,effective_status,insights.time_range({'since':'" + start_date + "','until':'" + end_date + "'}){actions,action_values,video_p25_watched_actions,video_p50_watched_actions,video_p75_watched_actions,video_p95_watched_actions,video_p100_watched_actions,impressions,reach,clicks,spend,cpc,cpm,ctr,purchase_roas}",
+                "fields": _AD_FIELDS,
+                "filtering": _ACTIVE_ADS_FILTER,
                 "limit": 100
             }
             
@@ -67,18 +70,17 @@ async def get_ads_from_facebook(state: Dict[str, Any]) -> Dict[str, Any]:
                 logger.warning("No data returned from Facebook API")
                 return {"ads": [], "analyzed_video_ids": []}
 
-            ads = data.get("data", [])
-            
-            # Additional filtering to ensure we only have active ads
-            active_ads = [ad for ad in ads if ad.get("effective_status") == "ACTIVE"]
+            active_ads = data.get("data", [])
             
-            logger.info(f"Retrieved {len(ads)} ads from Facebook API, {len(active_ads)} are active")
+            logger.info(f"Retrieved {len(active_ads)} active ads from Facebook API")
 
             if progress_callback:
                 await progress_callback(40, f"Found {len(active_ads)} active ads to analyze")
 
-            # Get previously analyzed video IDs for this user
-            analyzed_video_ids = await get_analyzed_video_ids(user_id)
+            # Get previously analyzed video IDs for this user, unless the caller already passed them in
+            analyzed_video_ids = state.get("analyzed_video_ids")
+            if not analyzed_video_ids:
+                analyzed_video_ids = await get_analyzed_video_ids(user_id)
             logger.info(f"Found {len(analyzed_video_ids)} previously analyzed videos for user {user_id}")
 
             return {
@@ -86,7 +88,7 @@ async def get_ads_from_facebook(state: Dict[str, Any]) -> Dict[str, Any]:
                 "analyzed_video_ids": analyzed_video_ids
             }
         finally:
-            # Always cleanup Facebook service to close HTTP client and thread pools
+            # Release the service; the shared HTTP client stays open for the next node
             await fb_service.cleanup()
 
     except ValueError as e:
@@ -101,13 +103,6 @@ async def get_ads_from_facebook(state: Dict[str, Any]) -> Dict[str, Any]:
         error_msg = f"Unexpected error in get_ads_from_facebook: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return {"errors": [error_msg]}
-    finally:
-        # Ensure cleanup happens even if an exception occurs
-        if 'fb_service' in locals():
-            try:
-                await fb_service.cleanup()
-            except Exception as cleanup_error:
-                logger.debug(f"Error during Facebook service cleanup: {cleanup_error}")
 
 async def get_analyzed_video_ids(user_id: str) -> List[str]:
     """
@@ -127,23 +122,12 @@ async def get_analyzed_video_ids(user_id: str) -> List[str]:
             logger.warning("Database not available, returning empty list")
             return []
         
-        # Query the ad_analyses collection for this user
-        cursor = db.ad_analyses.find(
-            {"user_id": user_id},
-            {"video_id": 1, "_id": 0}  # Only return video_id field
+        # Let MongoDB dedupe the user's non-empty video IDs, served from the (user_id, video_id) index
+        unique_video_ids = await db.ad_analyses.distinct(
+            "video_id",
+            {"user_id": user_id, "video_id": {"$type": "string", "$ne": ""}}
         )
-        
-        analyses = await cursor.to_list(length=None)
-        
-        # Extract video IDs, filtering out None/empty values
-        video_ids = [
-            analysis["video_id"] 
-            for analysis in analyses 
-            if analysis.get("video_id") is not None and analysis.get("video_id").strip()
-        ]
-        
-        # Remove duplicates while preserving order
-        unique_video_ids = list(dict.fromkeys(video_ids))
+        unique_video_ids = [video_id for video_id in unique_video_ids if video_id.strip()]
         
         logger.info(f"Found {len(unique_video_ids)} already analyzed video IDs for user {user_id}")
         if unique_video_ids:
@@ -1,9 +1,118 @@
+import time
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, List, Any, Callable, Optional
 from app.services.facebook_service import FacebookAdService
+from app.core.cancellation import gather_unless_cancelled
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent Graph API video URL requests
+MAX_CONCURRENT_URL_REQUESTS = 10
+# Video ids looked up per Graph API request via the ?ids= endpoint (Graph allows up to 50)
+VIDEO_IDS_PER_REQUEST = 50
+VIDEO_FIELDS = "source,permalink_url"
+
+# Video data is reused across runs for up to an hour, roughly how long Graph source URLs stay valid
+VIDEO_DATA_CACHE_TTL = 3600  # seconds
+VIDEO_DATA_CACHE_MAX_SIZE = 5000
+_video_data_cache: Dict[str, tuple] = {}  # video_id -> (expires_at, video data)
+
+def _get_cached_video_data(video_id: str) -> Optional[Dict[str, Any]]:
+    cached = _video_data_cache.get(video_id)
+    if cached is None:
+        return None
+    if cached[0] <= time.monotonic():
+        _video_data_cache.pop(video_id, None)
+        return None
+    return cached[1]
+
+def _cache_video_data(video_id: str, data: Dict[str, Any]):
+    # Evict the oldest entries (dicts keep insertion order) once the cache is full
+    while len(_video_data_cache) >= VIDEO_DATA_CACHE_MAX_SIZE:
+        _video_data_cache.pop(next(iter(_video_data_cache)))
+    _video_data_cache[video_id] = (time.monotonic() + VIDEO_DATA_CACHE_TTL, data)
+
+def _video_id(ad: Dict[str, Any]) -> Optional[str]:
+    """Return the video ID of an ad's creative, or None if it has no video."""
+    video_data = ((ad.get("creative") or {}).get("object_story_spec") or {}).get("video_data")
+    return video_data.get("video_id") if video_data else None
+
+async def _fetch_video_data(
+    fb_service: FacebookAdService,
+    semaphore: asyncio.Semaphore,
+    video_id: str,
+    is_cancelled: Callable[[], bool],
+    cancellation_token: Optional[Dict[str, bool]] = None
+) -> Optional[Any]:
+    """
+    Fetch the source and permalink URLs of a single video.
+
+    Returns:
+        The video data dict, an error message string if the request failed, or None if the job was cancelled.
+    """
+    async with semaphore:
+        # Check for cancellation before making API call
+        if is_cancelled():
+            logger.info(f"Job cancelled before video URL API call for video {video_id}")
+            return None
+
+        try:
+            # Use the robust _make_api_request method with cancellation token; concurrency is
+            # bounded by the semaphore, so the per-request pacing delay is skipped
+            return await fb_service._make_api_request(video_id, {"fields": VIDEO_FIELDS}, cancellation_token=cancellation_token, paced=False)
+        except Exception as e:
+            if is_cancelled():
+                return None
+            error_msg = f"Error getting video data for video_id {video_id}: {str(e)}"
+            logger.warning(error_msg)
+            return error_msg
+
+async def _fetch_video_batch(
+    fb_service: FacebookAdService,
+    semaphore: asyncio.Semaphore,
+    video_ids: List[str],
+    is_cancelled: Callable[[], bool],
+    cancellation_token: Optional[Dict[str, bool]] = None
+) -> Dict[str, Any]:
+    """
+    Fetch the URLs of up to VIDEO_IDS_PER_REQUEST videos with one ?ids= Graph API request.
+    Videos missing from the batch response, or all of them if the batch request fails
+    (e.g. one id is invalid), are looked up individually.
+
+    Returns:
+        dict: video_id -> video data dict or error message string. Empty if the job was cancelled.
+    """
+    batch_data = {}
+    async with semaphore:
+        if is_cancelled():
+            return {}
+
+        try:
+            batch_data = await fb_service._make_api_request(
+                "",
+                {"ids": ",".join(video_ids), "fields": VIDEO_FIELDS},
+                cancellation_token=cancellation_token,
+                paced=False
+            )
+        except Exception as e:
+            if is_cancelled():
+                return {}
+            logger.warning(f"Batch video URL request for {len(video_ids)} videos failed, looking them up individually: {e}")
+
+    results = {video_id: batch_data[video_id] for video_id in video_ids if isinstance(batch_data.get(video_id), dict)}
+
+    # Fall back to per-id lookups outside the semaphore so batches can't starve their own fallbacks
+    missing = [video_id for video_id in video_ids if video_id not in results]
+    if missing:
+        fallbacks = await asyncio.gather(*(
+            _fetch_video_data(fb_service, semaphore, video_id, is_cancelled, cancellation_token)
+            for video_id in missing
+        ))
+        results.update((video_id, data) for video_id, data in zip(missing, fallbacks) if data is not None)
+
+    return results
+
 async def get_video_urls_from_ads(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extracts video URLs for each ad with a video creative.
@@ -42,68 +151,78 @@ async def get_video_urls_from_ads(state: Dict[str, Any]) -> Dict[str, Any]:
         fb_service = FacebookAdService(access_token=access_token, account_id=account_id or "dummy")
         
         try:
-            video_urls = []
-            ads_with_videos = [ad for ad in ads if ad.get("creative", {}).get("object_story_spec", {}).get("video_data", {}).get("video_id")]
+            ads_with_videos = []
+            for ad in ads:
+                video_id = _video_id(ad)
+                if video_id:
+                    ads_with_videos.append((ad, video_id))
+                else:
+                    logger.debug(f"[SKIP] No video ID found for ad_id {ad.get('id')}")
 
             if progress_callback:
                 await progress_callback(43, f"Found {len(ads_with_videos)} ads with videos...")
 
-            for i, ad in enumerate(ads):
-                # Check for cancellation before each video URL extraction (both mechanisms)
-                if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                    logger.info(f"Job cancelled during video URL extraction (ad {i+1}/{len(ads)})")
-                    return {"errors": ["Job was cancelled"]}
-                
-                creative = ad.get("creative", {})
-                video_id = (
-                    creative
-                    .get("object_story_spec", {})
-                    .get("video_data", {})
-                    .get("video_id")
-                )
-
-                if not video_id:
-                    logger.debug(f"[SKIP] No video ID found for ad_id {ad.get('id')}")
-                    continue
-
-                # Report progress for video URL extraction
-                if progress_callback and ads_with_videos:
-                    video_index = len([v for v in video_urls if 'video_id' in v]) + 1
-                    url_progress = 43 + video_index / len(ads_with_videos) * 7  # 43-50% range
-                    await progress_callback(int(url_progress), f"Getting video URL {video_index}/{len(ads_with_videos)}...")
-
-                video_url = f"{fb_service.base_url}/{video_id}"
-                params = {
-                    "access_token": access_token,
-                    "fields": "source,permalink_url"
-                }
-
-                try:
-                    # Check for cancellation before making API call (both mechanisms)
-                    if (cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False):
-                        logger.info(f"Job cancelled before video URL API call for video {video_id}")
-                        return {"errors": ["Job was cancelled"]}
-                    
-                    # Use the robust _make_api_request method with cancellation token
-                    data = await fb_service._make_api_request(video_id, params, cancellation_token=cancellation_token)
-
-                    video_info = {
+            def is_cancelled() -> bool:
+                return bool((cancellation_token and cancellation_token.get("cancelled", False)) or state.get("cancelled", False))
+
+            # Reuse cached data for recently seen videos
+            video_data = {}
+            video_ids = []
+            for video_id in dict.fromkeys(video_id for _, video_id in ads_with_videos):
+                cached = _get_cached_video_data(video_id)
+                if cached is not None:
+                    video_data[video_id] = cached
+                else:
+                    video_ids.append(video_id)
+
+            if video_data:
+                logger.info(f"[🔗] Reusing cached URLs for {len(video_data)} videos, fetching {len(video_ids)}")
+
+            # Look up each remaining distinct video once, VIDEO_IDS_PER_REQUEST ids per request,
+            # with the batches fetched concurrently and bounded by the semaphore
+            batches = [video_ids[i:i + VIDEO_IDS_PER_REQUEST] for i in range(0, len(video_ids), VIDEO_IDS_PER_REQUEST)]
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_URL_REQUESTS)
+            fetched_count = 0
+
+            async def fetch_and_report(batch: List[str]) -> Dict[str, Any]:
+                nonlocal fetched_count
+                batch_results = await _fetch_video_batch(fb_service, semaphore, batch, is_cancelled, cancellation_token)
+
+                video_data.update(batch_results)
+                fetched_count += len(batch_results)
+                for video_id, data in batch_results.items():
+                    if isinstance(data, dict):
+                        _cache_video_data(video_id, data)
+
+                if progress_callback:
+                    url_progress = 43 + fetched_count / len(video_ids) * 7  # 43-50% range
+                    await progress_callback(int(url_progress), f"Getting video URL {fetched_count}/{len(video_ids)}...")
+                return batch_results
+
+            # In-flight requests are cancelled as soon as the job is, rather than at the next check
+            outcomes = await gather_unless_cancelled([fetch_and_report(batch) for batch in batches], cancellation_token)
+
+            if outcomes is None or is_cancelled():
+                logger.info(f"Job cancelled during video URL extraction ({fetched_count}/{len(video_ids)})")
+                return {"errors": ["Job was cancelled"]}
+
+            # Map the results back onto the ads, keeping the original ad order
+            video_urls = []
+            for ad, video_id in ads_with_videos:
+                data = video_data.get(video_id)
+                if isinstance(data, dict):
+                    video_urls.append({
                         "ad_id": ad.get("id"),
                         "video_id": video_id,
                         "source": data.get("source"),
                         "permalink_url": data.get("permalink_url")
-                    }
-
-                    video_urls.append(video_info)
+                    })
                     logger.debug(f"[✅] Found video URL for ad {ad.get('id')}, video {video_id}")
-
-                except Exception as e:
-                    error_msg = f"Error getting video data for video_id {video_id}: {str(e)}"
-                    logger.warning(error_msg)
+                elif data is not None:
                     video_urls.append({
                         "ad_id": ad.get("id"),
                         "video_id": video_id,
-                        "error": error_msg
+                        "error": data
                     })
 
             logger.info(f"[🔗] Found video URLs for {len([v for v in video_urls if 'error' not in v])} out of {len(video_urls)} ads with videos.")
@@ -114,17 +233,10 @@ async def get_video_urls_from_ads(state: Dict[str, Any]) -> Dict[str, Any]:
             
             return {"video_urls": video_urls}
         finally:
-            # Always cleanup Facebook service to close HTTP client and thread pools
+            # Release the service; the shared HTTP client stays open for the next node
             await fb_service.cleanup()
 
     except Exception as e:
         error_msg = f"Unexpected error in get_video_urls_from_ads: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return {"errors": [error_msg], "video_urls": []}
-    finally:
-        # Ensure cleanup happens even if an exception occurs
-        if 'fb_service' in locals():
-            try:
-                await fb_service.cleanup()
-            except Exception as cleanup_error:
-                logger.debug(f"Error during Facebook service cleanup: {cleanup_error}")
@@ -4,13 +4,24 @@ Text Classification Node for LangGraph AI Agent
 This node classifies user queries into different categories based on provided class definitions.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+import hashlib
 import logging
+import time
+import tiktoken
 from app.services.dynamic_prompt_service import dynamic_prompt_service
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Classifications are cached per normalized message, so repeated chat queries skip the model call
+CLASSIFICATION_CACHE_SIZE = 1024
+CLASSIFICATION_CACHE_TTL = 86400  # seconds
+
+# Logit bias applied to the tokens of the class names, restricting the output to those tokens
+CLASS_TOKEN_BIAS = 100
+
 class TextClassifierNode:
     """
     A dynamic text classifier node that can classify user queries based on provided class definitions.
@@ -29,6 +40,56 @@ class TextClassifierNode:
         """
         self.classification_classes = classification_classes
         self.default_class = "default"
+        # (template fingerprint, normalized message) -> (expires_at, classification)
+        self._classification_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # The classes are fixed for the node's lifetime, so their prompt text is built once
+        self._classes_description = "".join(f"{class_name}: {description}\n" for class_name, description in classification_classes.items())
+        # Names the model may answer with: the classes plus the default class the prompt falls back to
+        self._output_names = list(dict.fromkeys([*classification_classes, self.default_class]))
+        # Those names, longest first, so the output is matched against the most specific name
+        self._class_names = sorted((cls.lower() for cls in self._output_names), key=len, reverse=True)
+        # model -> (logit_bias, max_tokens) for restricting the output to the class names
+        self._output_constraints: Dict[str, tuple] = {}
+    
+    def _get_output_constraints(self, model: str) -> tuple:
+        """
+        Build the logit bias that limits the output to the tokens of the class names and the
+        default class, and the number of output tokens needed for the longest of them.
+        """
+        if model not in self._output_constraints:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+            
+            class_tokens = [encoding.encode(cls) for cls in self._output_names]
+            logit_bias = {str(token): CLASS_TOKEN_BIAS for tokens in class_tokens for token in tokens}
+            self._output_constraints[model] = (logit_bias, max(map(len, class_tokens)))
+        return self._output_constraints[model]
+    
+    def _match_class(self, output: str) -> Optional[str]:
+        """
+        Map the model output to a class name. The biased model can run on past the end of a
+        class name until max_tokens, so the output is matched by prefix.
+        """
+        output = output.strip().lower()
+        return next((cls for cls in self._class_names if output.startswith(cls)), None)
+    
+    def _get_cached_classification(self, cache_key: tuple) -> Optional[str]:
+        cached = self._classification_cache.get(cache_key)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del self._classification_cache[cache_key]
+            return None
+        self._classification_cache.move_to_end(cache_key)
+        return cached[1]
+    
+    def _cache_classification(self, cache_key: tuple, classification: str):
+        self._classification_cache[cache_key] = (time.monotonic() + CLASSIFICATION_CACHE_TTL, classification)
+        self._classification_cache.move_to_end(cache_key)
+        if len(self._classification_cache) > CLASSIFICATION_CACHE_SIZE:
+            self._classification_cache.popitem(last=False)
     
     async def classify_text(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -41,37 +102,52 @@ class TextClassifierNode:
             Updated state with classification result
         """
         try:
-            # Build the classification prompt dynamically
-            classes_description = ""
-            for class_name, description in self.classification_classes.items():
-                classes_description += f'{class_name}: {description}\n'
+            # Reuse an earlier classification of the same message, unless sampling makes the
+            # output non-deterministic; the template fingerprint invalidates entries when the
+            # prompt or model is edited (classes are fixed per node instance)
+            cache_key = None
+            prompt_text, model, temperature, _ = await dynamic_prompt_service.get_prompt_and_settings("text_classifier")
+            if prompt_text and not temperature:
+                template_fingerprint = hashlib.sha1(f"{model}|{prompt_text}".encode("utf-8")).hexdigest()
+                cache_key = (template_fingerprint, state["user_message"].strip().lower())
+                cached = self._get_cached_classification(cache_key)
+                if cached:
+                    logger.info(f"Classified user query '{state['user_message']}' as: {cached} (cached)")
+                    state["classification"] = cached
+                    return state
             
             # Prepare variables for the dynamic prompt
             prompt_variables = {
-                "classes_description": classes_description,
+                "classes_description": self._classes_description,
                 "default_class": self.default_class,
                 "user_message": state["user_message"]
             }
             
-            # Use dynamic prompt service for classification
+            # Use dynamic prompt service for classification, with the output limited to the
+            # class names' tokens and to just enough tokens for the longest name
+            logit_bias, max_tokens = self._get_output_constraints(model)
             classification_result = await dynamic_prompt_service.make_chat_completion(
                 prompt_key="text_classifier",
-                prompt_variables=prompt_variables
+                prompt_variables=prompt_variables,
+                logit_bias=logit_bias,
+                max_tokens=max_tokens
             )
             
             if classification_result:
-                classification = classification_result.strip().lower()
+                classification = self._match_class(classification_result)
+                # Ensure valid classification - if not in our classes, default to default_class
+                if classification is None:
+                    logger.warning(f"Invalid classification '{classification_result}', defaulting to '{self.default_class}'")
+                    classification = self.default_class
             else:
                 classification = self.default_class
                 logger.warning("Failed to get classification from dynamic prompt service, using default")
             
-            # Ensure valid classification - if not in our classes, default to default_class
-            if classification not in [cls.lower() for cls in self.classification_classes.keys()]:
-                classification = self.default_class
-                logger.warning(f"Invalid classification '{classification}', defaulting to '{self.default_class}'")
-            
             logger.info(f"Classified user query '{state['user_message']}' as: {classification}")
             
+            if cache_key and classification_result:
+                self._cache_classification(cache_key, classification)
+            
             state["classification"] = classification
             return state
             
@@ -1,33 +1,109 @@
 import os
+import asyncio
+import hashlib
 import logging
+import shutil
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.core.database import get_database, get_redis
 from app.services.openai_service import openai_service
 from app.services.dynamic_prompt_service import dynamic_prompt_service
+from app.core.cancellation import gather_unless_cancelled
+from .download_video import iter_downloads
 
 logger = logging.getLogger(__name__)
 
-def get_user_video_dir(user_id: str) -> Path:
+# Maximum number of videos transcribed concurrently
+MAX_CONCURRENT_TRANSCRIPTIONS = 6
+_transcription_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+
+# Transcriptions are cached by video content, so a creative re-run in a later job skips Whisper.
+# Redis serves hot entries; MongoDB keeps them past the Redis TTL and across Redis restarts.
+TRANSCRIPTION_CACHE_PREFIX = "trx:"
+TRANSCRIPTION_CACHE_TTL = 30 * 86400  # seconds
+TRANSCRIPTION_CACHE_COLLECTION = "transcription_cache"
+TRANSCRIPTION_LANGUAGE = "ur"
+
+# Whisper only uses 16 kHz mono audio, so upload that as low-bitrate Opus instead of the whole MP4
+FFMPEG_PATH = shutil.which("ffmpeg")
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BITRATE = "24k"
+
+def _file_digest(path: Path) -> str:
+    """BLAKE2b digest of a file's bytes, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _transcription_cache_key(content_hash: str, model: str, prompt_text: str) -> str:
+    prompt_hash = hashlib.sha1(prompt_text.encode("utf-8")).hexdigest()[:12]
+    return f"{TRANSCRIPTION_CACHE_PREFIX}{content_hash}:{model}:{TRANSCRIPTION_LANGUAGE}:{prompt_hash}"
+
+async def _extract_audio(video_path: Path) -> Optional[bytes]:
     """
-    Create and return user-specific video directory outside the app folder.
-    
-    Args:
-        user_id (str): The user ID
-        
-    Returns:
-        Path: User-specific video directory path
+    Extract the audio track as 16 kHz mono Opus in an Ogg container.
+    Returns None when ffmpeg is unavailable or fails, so the caller can upload the video itself.
     """
-    # Get the Backend directory (4 levels up from current file)
-    # Current: Backend/app/core/AI_Agent/Nodes/transcribe_video.py
-    # Target:  Backend/
-    backend_dir = Path(__file__).resolve().parent.parent.parent.parent.parent
-    
-    # Create user-specific video directory: Backend/videos_<user_id>/
-    user_video_dir = backend_dir / f"videos_{user_id}"
-    user_video_dir.mkdir(exist_ok=True)
-    
-    logger.debug(f"[📁] Using video directory: {user_video_dir}")
-    return user_video_dir
+    if not FFMPEG_PATH:
+        return None
+
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG_PATH, "-loglevel", "error", "-i", str(video_path),
+        "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        "-c:a", "libopus", "-b:a", AUDIO_BITRATE, "-f", "ogg", "pipe:1",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0 or not stdout:
+        logger.warning(f"ffmpeg audio extraction failed for {video_path.name}: {stderr.decode(errors='replace').strip()}")
+        return None
+
+    return stdout
+
+async def _get_cached_transcription(cache_key: str) -> Optional[str]:
+    try:
+        cached = await get_redis().get(cache_key)
+        if cached:
+            return cached
+    except Exception as e:
+        logger.debug(f"Transcription cache lookup failed: {e}")
+
+    try:
+        doc = await get_database()[TRANSCRIPTION_CACHE_COLLECTION].find_one({"key": cache_key}, {"text": 1})
+        if doc:
+            try:
+                await get_redis().setex(cache_key, TRANSCRIPTION_CACHE_TTL, doc["text"])
+            except Exception as e:
+                logger.debug(f"Transcription cache backfill failed: {e}")
+            return doc["text"]
+    except Exception as e:
+        logger.debug(f"Persistent transcription cache lookup failed: {e}")
+    return None
+
+async def _cache_transcription(cache_key: str, text: str):
+    try:
+        await get_redis().setex(cache_key, TRANSCRIPTION_CACHE_TTL, text)
+    except Exception as e:
+        logger.debug(f"Transcription cache write failed: {e}")
+
+    try:
+        await get_database()[TRANSCRIPTION_CACHE_COLLECTION].update_one(
+            {"key": cache_key},
+            {"$set": {"text": text, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.debug(f"Persistent transcription cache write failed: {e}")
 
 async def transcribe_video(video_path: Path, cancellation_token=None) -> str:
     """
@@ -47,15 +123,28 @@ async def transcribe_video(video_path: Path, cancellation_token=None) -> str:
             prompt_text = "This is a Pakistani Urdu advertisement. You may find words like Oud-al-abraj, outlet, purchase, online etc. Transcribe the spoken content in Urdu script."
             model = "whisper-1"
         
+        # Reuse the transcription of an identical video file
+        cache_key = _transcription_cache_key(await asyncio.to_thread(_file_digest, video_path), model, prompt_text)
+        cached = await _get_cached_transcription(cache_key)
+        if cached:
+            logger.info(f"[♻️] Reusing cached transcription for {video_path.name}")
+            return cached
+        
+        audio = await _extract_audio(video_path)
+        
         # Use the robust OpenAI service with rate limiting
         result = await openai_service._make_transcription(
             audio_file_path=str(video_path),
             model=model,
-            language="ur",
+            language=TRANSCRIPTION_LANGUAGE,
             prompt=prompt_text,
-            cancellation_token=cancellation_token
+            cancellation_token=cancellation_token,
+            audio_data=(f"{video_path.stem}.ogg", audio) if audio else None
         )
         
+        if result:
+            await _cache_transcription(cache_key, result)
+        
         return result
     except ValueError as e:
         if "cancelled" in str(e).lower():
@@ -68,9 +157,23 @@ async def transcribe_video(video_path: Path, cancellation_token=None) -> str:
         logger.error(f"❌ Failed to transcribe {video_path.name}: {e}", exc_info=True)
         return None
 
+async def _transcribe_with_limit(video_path: Path, cancellation_token=None) -> str:
+    """Transcribe a video once a concurrency slot is free."""
+    async with _transcription_semaphore:
+        # Check for cancellation after waiting for a slot
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            return None
+
+        logger.info(f"[🎙️] Transcribing: {video_path.name}")
+        return await transcribe_video(video_path, cancellation_token)
+
 async def transcribe_all_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     LangGraph-compatible node to transcribe all videos and return results in memory only.
+
+    When the state carries a download queue, this node runs alongside Download Video and starts
+    transcribing each video as soon as it is downloaded; otherwise it transcribes the
+    downloaded_videos list.
     """
     # Check for cancellation at the start
     cancellation_token = state.get("cancellation_token")
@@ -81,10 +184,13 @@ async def transcribe_all_videos(state: Dict[str, Any]) -> Dict[str, Any]:
     results = []
     video_paths = state.get("downloaded_videos", [])
     user_id = state.get("user_id")
-    analyzed_video_ids = state.get("analyzed_video_ids", [])
+    analyzed_video_ids = set(state.get("analyzed_video_ids", []))
     progress_callback = state.get("progress_callback")
+    download_queue = (state.get("download_queues") or {}).get("transcribe")
+    downloads_done = state.get("downloads_done")
+    pipelined = download_queue is not None and downloads_done is not None
 
-    if not video_paths:
+    if not pipelined and not video_paths:
         logger.warning("[⚠️] No video paths found in state. Skipping transcription.")
         return {"transcriptions": []}
     
@@ -93,63 +199,82 @@ async def transcribe_all_videos(state: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(error_msg)
         return {"errors": [error_msg]}
 
-    logger.info(f"[🎙️] Starting transcription of {len(video_paths)} videos...")
-    
-    if progress_callback:
-        await progress_callback(76, f"Starting video transcription ({len(video_paths)} videos)...")
-
-    for i, video_file in enumerate(video_paths):
-        try:
-            # Check for cancellation before each transcription
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled during video transcription (video {i+1}/{len(video_paths)})")
-                return {"errors": ["Job was cancelled"]}
-            
-            video_file = Path(video_file)
-            
-            # Extract video ID from filename (assuming format: video_{id}.mp4)
-            video_id = video_file.stem.replace("video_", "")
-            
-            # Skip if already analyzed
-            if video_id in analyzed_video_ids:
-                logger.info(f"[⏩] Skipping {video_file.name} (already analyzed)")
-                
-                if progress_callback:
-                    transcribe_progress = 76 + (i + 1) / len(video_paths) * 8  # 76-84% range
-                    await progress_callback(int(transcribe_progress), f"Transcription {i + 1}/{len(video_paths)} (skipped)")
-                continue
-
-            logger.info(f"[🎙️] Transcribing: {video_file.name}")
-            
-            if progress_callback:
-                transcribe_progress = 76 + i / len(video_paths) * 8  # 76-84% range
-                await progress_callback(int(transcribe_progress), f"Transcribing video {i + 1}/{len(video_paths)}...")
-            
-            # Check for cancellation before starting transcription
-            if cancellation_token and cancellation_token.get("cancelled", False):
-                logger.info(f"Job cancelled before transcribing {video_file.name}")
-                return {"errors": ["Job was cancelled"]}
-            
-            text = await transcribe_video(video_file, cancellation_token)
-
-            if text:
-                results.append({
-                    "video_id": video_id,
-                    "file": video_file.name, 
-                    "text": text
-                })
-                logger.info(f"[✅] Transcribed: {video_file.name}")
-                
-                if progress_callback:
-                    transcribe_progress = 76 + (i + 1) / len(video_paths) * 8  # 76-84% range
-                    await progress_callback(int(transcribe_progress), f"Transcribed video {i + 1}/{len(video_paths)}")
-            else:
-                error_msg = f"Failed to transcribe {video_file.name}"
-                logger.error(error_msg)
-
-        except Exception as e:
-            error_msg = f"Error processing video {video_file}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+    if pipelined:
+        # The number of downloads isn't known yet; every video with a URL is expected
+        total_videos = len([v for v in state.get("video_urls", []) if "error" not in v])
+        logger.info(f"[🎙️] Transcribing videos as they are downloaded (up to {total_videos})...")
+    else:
+        total_videos = len(video_paths)
+        logger.info(f"[🎙️] Starting transcription of {total_videos} videos...")
+        
+        if progress_callback:
+            await progress_callback(76, f"Starting video transcription ({total_videos} videos)...")
+
+    completed_count = 0
+
+    async def transcribe_and_report(video_file: Path) -> str:
+        nonlocal completed_count
+        text = await _transcribe_with_limit(video_file, cancellation_token)
+
+        completed_count += 1
+        # While downloads are still running they own the progress bar (50-75%)
+        if progress_callback and total_videos and (not pipelined or downloads_done.is_set()):
+            transcribe_progress = 76 + min(completed_count / total_videos, 1) * 8  # 76-84% range
+            await progress_callback(int(transcribe_progress), f"Transcribed video {completed_count}/{total_videos}")
+        return text
+
+    pending = []
+    tasks = []
+
+    def submit(video_file: Path):
+        nonlocal completed_count
+        # Extract video ID from filename (assuming format: video_{id}.mp4)
+        video_id = video_file.stem.replace("video_", "")
+
+        # Skip if already analyzed; skipped videos count as done for progress reporting
+        if video_id in analyzed_video_ids:
+            logger.info(f"[⏩] Skipping {video_file.name} (already analyzed)")
+            completed_count += 1
+            return
+
+        pending.append((video_id, video_file))
+        tasks.append(asyncio.ensure_future(transcribe_and_report(video_file)))
+
+    if pipelined:
+        # Start each transcription as soon as its download lands, bounded by _transcription_semaphore
+        async for video_file in iter_downloads(download_queue, downloads_done, cancellation_token):
+            submit(video_file)
+
+        if cancellation_token and cancellation_token.get("cancelled", False):
+            for task in tasks:
+                task.cancel()
+            logger.info("Job cancelled while waiting for downloads to transcribe")
+            return {"errors": ["Job was cancelled"]}
+    else:
+        for video_file in map(Path, video_paths):
+            submit(video_file)
+
+    # Wait for all transcriptions, cancelling them as soon as the job is cancelled
+    outcomes = await gather_unless_cancelled(tasks, cancellation_token, return_exceptions=True)
+
+    if outcomes is None or (cancellation_token and cancellation_token.get("cancelled", False)):
+        logger.info("Job cancelled during video transcription")
+        return {"errors": ["Job was cancelled"]}
+
+    for (video_id, video_file), text in zip(pending, outcomes):
+        if isinstance(text, Exception):
+            error_msg = f"Error processing video {video_file}: {str(text)}"
+            logger.error(error_msg, exc_info=text)
+        elif text:
+            results.append({
+                "video_id": video_id,
+                "file": video_file.name, 
+                "text": text
+            })
+            logger.info(f"[✅] Transcribed: {video_file.name}")
+        else:
+            error_msg = f"Failed to transcribe {video_file.name}"
+            logger.error(error_msg)
 
     logger.info(f"[🎙️] Completed transcription of {len(results)} videos")
     
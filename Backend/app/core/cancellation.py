@@ -0,0 +1,53 @@
+import asyncio
+from typing import Optional
+
+
+class CancellationToken(dict):
+    """
+    Cancellation flag shared between a background job and the AI agent nodes.
+
+    It behaves like the {"cancelled": bool} dict the nodes already check, and also
+    carries an asyncio.Event so concurrent fan-outs can await cancellation and
+    cancel their tasks instead of polling the flag.
+    """
+
+    def __init__(self):
+        super().__init__(cancelled=False)
+        self.event = asyncio.Event()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "cancelled" and value:
+            self.event.set()
+
+    def is_set(self) -> bool:
+        return self.event.is_set()
+
+    async def wait(self):
+        await self.event.wait()
+
+
+async def gather_unless_cancelled(aws: list, cancellation_token=None, return_exceptions: bool = False) -> Optional[list]:
+    """
+    Run awaitables concurrently and cancel them as soon as the job is cancelled.
+
+    Returns:
+        The gathered results in input order, or None if the job was cancelled.
+    """
+    if not isinstance(cancellation_token, CancellationToken):
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    gather_task = asyncio.ensure_future(asyncio.gather(*aws, return_exceptions=return_exceptions))
+    cancel_waiter = asyncio.create_task(cancellation_token.wait())
+
+    done, pending = await asyncio.wait({gather_task, cancel_waiter}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    if gather_task not in done:
+        return None
+    return gather_task.result()
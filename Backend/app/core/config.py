@@ -34,6 +34,12 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     openai_api_key: str
+    openai_max_rpm: int = 500  # Requests per minute allowed by the account tier
+    openai_max_tpm: int = 30000  # Tokens per minute allowed by the account tier
+    transcription_analysis_model: str = "gpt-4o-mini"  # Model for transcript analysis
+    transcription_fallback_model: str = "gpt-4o"  # Retried when the analysis model returns no techniques or product
+    frame_analysis_batch_mode: bool = False  # Background jobs analyze frames through the Batch API (half price, slower)
+    frame_batch_timeout_minutes: float = 120.0  # Give up on a frame batch after this long and analyze synchronously
     
     # N8N Configuration
     N8N_WEBHOOK_URL: str
@@ -1,15 +1,24 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
-import redis
+import redis.asyncio as aioredis
 from app.core.config import settings
 
 # MongoDB Connection
 mongodb_client: AsyncIOMotorClient = None
 
+# One client (and connection pool) is shared by every service. Wire compression is negotiated
+# with the server per connection; pymongo skips compressors whose library isn't installed.
+MONGODB_CLIENT_OPTIONS = {
+    "compressors": "zstd,snappy",
+    "maxPoolSize": 200,
+    "minPoolSize": 10,
+    "serverSelectionTimeoutMS": 3000,
+}
+
 async def connect_to_mongodb():
     global mongodb_client
     try:
         print(f"Before connection - mongodb_client: {mongodb_client}")
-        mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL)
+        mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL, **MONGODB_CLIENT_OPTIONS)
         print(f"After assignment - mongodb_client: {mongodb_client}")
         print(f"MongoDB URL: {settings.MONGODB_URL}")
         
@@ -46,13 +55,20 @@ async def get_users_collection() -> AsyncIOMotorCollection:
     db = get_database()
     return db.users
 
-# Redis Connection
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
-    decode_responses=True
+# Redis Connection (asyncio client, so cache reads and writes are awaited on the event loop)
+redis_client = aioredis.Redis(
+    connection_pool=aioredis.ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        decode_responses=True,
+        max_connections=64
+    )
 )
 
 def get_redis():
-    return redis_client 
\ No newline at end of file
+    return redis_client
+
+async def close_redis_connection():
+    await redis_client.connection_pool.disconnect()
+    print("Redis connection closed.") 
\ No newline at end of file
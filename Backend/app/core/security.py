@@ -42,16 +42,10 @@ async def get_current_user_email(token: str = Depends(oauth2_scheme)):
         if email is None:
             raise credentials_exception
         
-        # Check token expiration
-        exp = payload.get("exp")
-        if exp is None:
+        # Tokens must carry an expiry; jwt.decode has already rejected expired ones
+        if payload.get("exp") is None:
             raise credentials_exception
-        
-        # Convert exp to datetime for comparison
-        exp_datetime = datetime.fromtimestamp(exp)
-        if exp_datetime < datetime.utcnow():
-            raise expired_token_exception
-            
+
         return email
     except jwt.ExpiredSignatureError:
         raise expired_token_exception
@@ -4,9 +4,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
 from app.core.config import settings
-from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database
+from app.core.database import connect_to_mongodb, close_mongodb_connection, close_redis_connection, get_database
 from app.api.v1.router import api_router
 from app.services.scheduler_service import SchedulerService
+from app.services.openai_service import openai_service
+from app.services.semantic_cache_service import SemanticCacheService
+from app.services.facebook_service import close_http_client as close_facebook_client
+from app.core.AI_Agent.Nodes.download_video import close_http_client as close_download_client
+from app.core.AI_Agent.Nodes.extract_frames import start_frame_pool, shutdown_frame_pool
 
 # Define variable for scheduler service
 scheduler_service = None
@@ -31,6 +36,9 @@ app.add_middleware(
 async def startup_db_client():
     global scheduler_service
     
+    # Create the frame extraction worker pool up front instead of inside a request
+    start_frame_pool()
+    
     # First establish database connection
     await connect_to_mongodb()
     
@@ -54,6 +62,16 @@ async def startup_db_client():
     if "ad_analyses" not in collections:
         await db.create_collection("ad_analyses")
         await db.ad_analyses.create_index("user_id")
+    
+    # Covers the distinct() lookup of a user's analyzed video IDs; also added to existing collections
+    await db.ad_analyses.create_index([("user_id", 1), ("video_id", 1)])
+    
+    # Content-addressed transcription cache
+    await db.transcription_cache.create_index("key", unique=True)
+    
+    # Semantic response cache: looked up per namespace, entries expire after ENTRY_TTL_DAYS
+    await db.semantic_cache.create_index([("namespace", 1), ("created_at", -1)])
+    await db.semantic_cache.create_index("created_at", expireAfterSeconds=SemanticCacheService.ENTRY_TTL_DAYS * 86400)
         
     if "ad_metrics" not in collections:
         await db.create_collection("ad_metrics")
@@ -129,6 +147,9 @@ async def startup_db_client():
     # Start the scheduler and schedule metrics collection for all users
     scheduler_service.start()
     await scheduler_service.schedule_metrics_collection_for_all_users()
+    
+    # Establish the OpenAI connection so the first analysis doesn't pay for the handshake
+    await openai_service.warmup()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
@@ -138,8 +159,17 @@ async def shutdown_db_client():
     if scheduler_service:
         scheduler_service.shutdown()
     
-    # Close MongoDB connection
+    # Close the pooled OpenAI, Facebook Graph API and video download HTTP clients
+    await openai_service.cleanup()
+    await close_facebook_client()
+    await close_download_client()
+    
+    # Stop the frame extraction worker processes
+    shutdown_frame_pool()
+    
+    # Close MongoDB and Redis connections
     await close_mongodb_connection()
+    await close_redis_connection()
 
 # Include API routers
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
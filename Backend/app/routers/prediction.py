@@ -147,7 +147,7 @@ async def get_best_performing_ad(
 
         # Try serving from cache unless force_refresh is requested and redis is available
         if redis_client and not force_refresh:
-            cached_value = redis_client.get(cache_key)
+            cached_value = await redis_client.get(cache_key)
             if cached_value:
                 try:
                     return json.loads(cached_value)
@@ -217,7 +217,7 @@ async def get_best_performing_ad(
             # Cache the response if redis available
             if redis_client:
                 try:
-                    redis_client.setex(cache_key, 3600, json.dumps(response_data))
+                    await redis_client.setex(cache_key, 3600, json.dumps(response_data))
                 except Exception:
                     pass
             return response_data
@@ -243,7 +243,7 @@ async def get_best_performing_ad(
             # Cache the response if redis available
             if redis_client:
                 try:
-                    redis_client.setex(cache_key, 3600, json.dumps(response_data))
+                    await redis_client.setex(cache_key, 3600, json.dumps(response_data))
                 except Exception:
                     pass
             return response_data
@@ -280,7 +280,7 @@ async def get_best_performing_ad(
                 # Cache the response if redis available
                 if redis_client:
                     try:
-                        redis_client.setex(cache_key, 3600, json.dumps(response_data))
+                        await redis_client.setex(cache_key, 3600, json.dumps(response_data))
                     except Exception:
                         pass
                 return response_data
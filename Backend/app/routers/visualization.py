@@ -40,7 +40,7 @@ async def get_ad_performance_segments(
         # Attempt to serve from cache for the exact date range
         cache_key = f"ad_perf_segments:{current_user.id}:{start_date}:{end_date}"
 
-        cached = redis_client.get(cache_key)
+        cached = await redis_client.get(cache_key)
         if cached:
             try:
                 return json.loads(cached)
@@ -338,7 +338,7 @@ async def get_ad_performance_segments(
 
         # Store in cache for 1 hour keyed by full date range
         try:
-            redis_client.setex(cache_key, 3600, json.dumps(response_payload))
+            await redis_client.setex(cache_key, 3600, json.dumps(response_payload))
         except Exception as e:
             logger.warning(f"Failed to cache visualization data: {e}")
 
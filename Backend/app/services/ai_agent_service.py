@@ -60,7 +60,8 @@ class AIAgentService:
         access_token: str, 
         account_id: str,
         progress_callback = None,
-        cancellation_token = None
+        cancellation_token = None,
+        batch_mode: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Run AI Agent analysis with database integration.
@@ -72,6 +73,7 @@ class AIAgentService:
             account_id: Facebook ad account ID
             progress_callback: Optional callback function to report progress
             cancellation_token: Optional cancellation token
+            batch_mode: Analyze frames through the OpenAI Batch API (cheaper, slower)
             
         Returns:
             List of stored ad analysis results
@@ -96,7 +98,8 @@ class AIAgentService:
                 account_id=account_id,
                 analyzed_video_ids=analyzed_video_ids,  # Pass the analyzed video IDs
                 progress_callback=progress_callback,  # Pass progress callback
-                cancellation_token=cancellation_token  # Pass cancellation token
+                cancellation_token=cancellation_token,  # Pass cancellation token
+                batch_mode=batch_mode
             )
             
             if not graph_output or not isinstance(graph_output, dict):
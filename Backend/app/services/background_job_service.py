@@ -5,7 +5,9 @@ from datetime import datetime, timedelta
 from bson import ObjectId
 import random
 
+from app.core.config import settings
 from app.core.database import get_database, get_mongodb_client
+from app.core.cancellation import CancellationToken
 from app.models.job_status import BackgroundJob, JobStatus, JobType, BackgroundJobResponse
 from app.services.ai_agent_service import AIAgentService
 
@@ -17,7 +19,7 @@ class BackgroundJobService:
     def __init__(self):
         self.ai_agent_service = AIAgentService()
         self._running_jobs: Dict[str, asyncio.Task] = {}
-        self._cancellation_tokens: Dict[str, Dict[str, bool]] = {}  # Track cancellation tokens
+        self._cancellation_tokens: Dict[str, CancellationToken] = {}  # Track cancellation tokens
     
     @property
     def db(self):
@@ -94,7 +96,7 @@ class BackgroundJobService:
             logger.debug(f"Job stored with ObjectId: {result.inserted_id}")
             
             # Create cancellation token for this job immediately
-            cancellation_token = {"cancelled": False}
+            cancellation_token = CancellationToken()
             self._cancellation_tokens[job_id] = cancellation_token
             
             # Start the background task
@@ -329,7 +331,7 @@ class BackgroundJobService:
             logger.info(f"Step 4: Creating progress callback for job {job_id}")
             
             # Get the existing cancellation token for this job
-            cancellation_token = self._cancellation_tokens.get(job_id, {"cancelled": False})
+            cancellation_token = self._cancellation_tokens.get(job_id) or CancellationToken()
             
             # Create progress callback function
             async def progress_callback(progress: int, message: str):
@@ -356,7 +358,8 @@ class BackgroundJobService:
                 access_token=access_token,
                 account_id=account_id,
                 progress_callback=progress_callback,
-                cancellation_token=cancellation_token
+                cancellation_token=cancellation_token,
+                batch_mode=settings.frame_analysis_batch_mode
             )
             
             logger.info(f"Step 6: AI Agent analysis completed for job {job_id}. Results: {len(analysis_results)}")
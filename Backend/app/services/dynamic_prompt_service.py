@@ -1,17 +1,43 @@
 from typing import Dict, Any, Optional, List
+import hashlib
 import logging
+import time
 
+from app.core.database import get_redis
 from app.services.prompt_template_service import PromptTemplateService
 from app.services.openai_service import openai_service
 
 logger = logging.getLogger(__name__)
 
+# Chat roles stored in conversation history mapped to OpenAI API roles
+_ROLE_MAP = {
+    "bot": "assistant",
+    "user": "user",
+    "assistant": "assistant",
+    "system": "system"
+}
+
 class DynamicPromptService:
     """Service for getting dynamic prompts and making AI calls with them"""
     
+    # Redis cache for responses to identical prompts
+    RESPONSE_CACHE_PREFIX = "response:"
+    RESPONSE_CACHE_TTL = 604800  # seconds
+    
+    # In-process cache of prompt templates, so per-item calls don't each query MongoDB
+    PROMPT_CACHE_TTL = 60  # seconds
+    
     def __init__(self):
         # Use the global openai_service instance instead of creating our own client
         self.openai_service = openai_service
+        self._prompt_cache: Dict[str, tuple] = {}  # prompt_key -> (expires_at, settings)
+    
+    def clear_prompt_cache(self, prompt_key: Optional[str] = None):
+        """Drop cached templates after they are edited, for one key or all of them."""
+        if prompt_key is None:
+            self._prompt_cache.clear()
+        else:
+            self._prompt_cache.pop(prompt_key, None)
     
     async def get_prompt_and_settings(self, prompt_key: str) -> tuple[Optional[str], str, float, Optional[int]]:
         """
@@ -20,12 +46,19 @@ class DynamicPromptService:
         Returns:
             tuple: (prompt_text, model, temperature, max_tokens)
         """
+        cached = self._prompt_cache.get(prompt_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
         template = await PromptTemplateService.get_prompt_template(prompt_key)
         if template:
-            return template.prompt_text, template.model, template.temperature, template.max_tokens
+            prompt_settings = (template.prompt_text, template.model, template.temperature, template.max_tokens)
         else:
             logger.warning(f"Prompt template '{prompt_key}' not found, using defaults")
-            return None, "gpt-4o", 0.4, None
+            prompt_settings = (None, "gpt-4o", 0.4, None)
+        
+        self._prompt_cache[prompt_key] = (time.monotonic() + self.PROMPT_CACHE_TTL, prompt_settings)
+        return prompt_settings
     
     async def format_prompt(self, prompt_key: str, **kwargs) -> Optional[str]:
         """
@@ -63,7 +96,7 @@ class DynamicPromptService:
             messages: List of messages (if None, will create from prompt)
             prompt_variables: Variables to format the prompt with
             cancellation_token: Optional cancellation token to check for job cancellation
-            **override_settings: Override model settings (model, temperature, max_tokens)
+            **override_settings: Override model settings (model, temperature, max_tokens, response_format, logit_bias)
             
         Returns:
             Response content or None if failed
@@ -97,13 +130,116 @@ class DynamicPromptService:
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                cancellation_token=cancellation_token
+                cancellation_token=cancellation_token,
+                response_format=override_settings.get('response_format'),
+                logit_bias=override_settings.get('logit_bias')
             )
             
         except Exception as e:
             logger.error(f"Error in dynamic chat completion for '{prompt_key}': {e}")
             return None
     
+    async def _resolve_cached_prompt(self, prompt_key: str, prompt_variables: Dict[str, Any], override_settings: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Format a prompt and compute its response cache key. Pops model, temperature and
+        max_tokens from override_settings.
+        
+        Returns:
+            tuple: (cache key, formatted prompt, model, temperature, max_tokens), or None if
+            the prompt is missing or cannot be formatted
+        """
+        prompt_text, model, temperature, max_tokens = await self.get_prompt_and_settings(prompt_key)
+        if not prompt_text:
+            logger.error(f"No prompt found for key '{prompt_key}'")
+            return None
+        
+        model = override_settings.pop('model', model)
+        temperature = override_settings.pop('temperature', temperature)
+        max_tokens = override_settings.pop('max_tokens', max_tokens)
+        
+        try:
+            formatted_prompt = prompt_text.format(**prompt_variables)
+        except KeyError as e:
+            logger.error(f"Missing variable {e} for prompt '{prompt_key}'")
+            return None
+        
+        digest = hashlib.sha256(f"{model}|{prompt_key}|{temperature}|{formatted_prompt}".encode("utf-8"))
+        return self.RESPONSE_CACHE_PREFIX + digest.hexdigest(), formatted_prompt, model, temperature, max_tokens
+    
+    async def get_cached_response(self, prompt_key: str, prompt_variables: Dict[str, Any], **override_settings) -> Optional[str]:
+        """Return the response cached_chat_completion stored for this prompt, without making a request."""
+        resolved = await self._resolve_cached_prompt(prompt_key, prompt_variables, override_settings)
+        if not resolved:
+            return None
+        
+        try:
+            return await get_redis().get(resolved[0])
+        except Exception as e:
+            logger.debug(f"Response cache lookup failed: {e}")
+            return None
+    
+    async def cache_response(self, prompt_key: str, prompt_variables: Dict[str, Any], result: str, **override_settings):
+        """Store a response obtained elsewhere (e.g. from a batched prompt) as this prompt's cached response."""
+        resolved = await self._resolve_cached_prompt(prompt_key, prompt_variables, override_settings)
+        if not resolved:
+            return
+        
+        try:
+            await get_redis().setex(resolved[0], self.RESPONSE_CACHE_TTL, result)
+        except Exception as e:
+            logger.debug(f"Response cache write failed: {e}")
+    
+    async def cached_chat_completion(
+        self,
+        prompt_key: str,
+        prompt_variables: Dict[str, Any],
+        cancellation_token: Optional[Dict[str, bool]] = None,
+        **override_settings
+    ) -> Optional[str]:
+        """
+        Make a chat completion like make_chat_completion, reusing the stored response
+        when the same prompt was already sent with the same model and temperature.
+        
+        Args:
+            prompt_key: The key of the prompt template to use
+            prompt_variables: Variables to format the prompt with
+            cancellation_token: Optional cancellation token to check for job cancellation
+            **override_settings: Override model settings (model, temperature, max_tokens, response_format)
+            
+        Returns:
+            Response content or None if failed
+        """
+        resolved = await self._resolve_cached_prompt(prompt_key, prompt_variables, override_settings)
+        if not resolved:
+            return None
+        cache_key, formatted_prompt, model, temperature, max_tokens = resolved
+        
+        try:
+            cached = await get_redis().get(cache_key)
+            if cached:
+                logger.debug(f"Response cache hit for '{prompt_key}'")
+                return cached
+        except Exception as e:
+            logger.debug(f"Response cache lookup failed: {e}")
+        
+        result = await self.make_chat_completion(
+            prompt_key=prompt_key,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            cancellation_token=cancellation_token,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **override_settings
+        )
+        
+        if result:
+            try:
+                await get_redis().setex(cache_key, self.RESPONSE_CACHE_TTL, result)
+            except Exception as e:
+                logger.debug(f"Response cache write failed: {e}")
+        
+        return result
+    
     async def make_chat_completion_with_context(
         self,
         prompt_key: str,
@@ -157,16 +293,14 @@ class DynamicPromptService:
             
             # Add previous conversation context
             if previous_messages:
-                for msg in previous_messages:
-                    # Map 'bot' role to 'assistant' for OpenAI API compatibility
-                    role = msg.get("role", "user")
-                    if role == "bot":
-                        role = "assistant"
-                    
-                    messages.append({
-                        "role": role,
+                # Map 'bot' role to 'assistant' for OpenAI API compatibility
+                messages.extend(
+                    {
+                        "role": _ROLE_MAP.get(msg.get("role", "user"), "user"),
                         "content": msg.get("content", "")
-                    })
+                    }
+                    for msg in previous_messages
+                )
             
             # Add current user message
             messages.append({
@@ -7,10 +7,36 @@ import random
 import time
 from app.services.facebook_quota import FacebookQuotaManager
 import json
+import orjson
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# HTTP client shared by all FacebookAdService instances, so keep-alive connections and TLS
+# sessions to graph.facebook.com survive across agent nodes and requests
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=30.0
+            )
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared Graph API client on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class FacebookAdService:
     FB_API_VERSION = "v19.0"
     MAX_RETRIES = 3
@@ -28,6 +54,7 @@ class FacebookAdService:
         self.account_id = account_id.replace('act_', '')
         self.base_url = f"https://graph.facebook.com/{self.FB_API_VERSION}"
         self._last_request_time = 0  # Track last request time
+        self._pacing_lock = asyncio.Lock()  # Concurrent requests take their REQUEST_DELAY slots in turn
         self._client = None
         self.quota_manager = FacebookQuotaManager()
         
@@ -37,28 +64,17 @@ class FacebookAdService:
     
     @property
     async def client(self):
-        """Get or create httpx client."""
+        """Get the shared httpx client."""
         if self._client is None:
-            self._client = httpx.AsyncClient(
-                timeout=30.0,
-                limits=httpx.Limits(
-                    max_keepalive_connections=5,
-                    max_connections=10,
-                    keepalive_expiry=30.0
-                )
-            )
+            self._client = _get_http_client()
         return self._client
     
     async def cleanup(self):
-        """Clean up resources, especially HTTP client and its thread pools."""
-        if self._client is not None:
-            try:
-                await self._client.aclose()
-                logger.debug("FacebookAdService HTTP client closed successfully")
-            except Exception as e:
-                logger.debug(f"Error closing FacebookAdService HTTP client: {e}")
-            finally:
-                self._client = None
+        """
+        Release this service's reference to the HTTP client. The shared client itself
+        stays open for other instances and is closed by close_http_client() on shutdown.
+        """
+        self._client = None
     
     @classmethod
     def _track_request_rate(cls):
@@ -275,7 +291,7 @@ class FacebookAdService:
             logger.error(error_msg)
             raise ValueError(error_msg)
     
-    async def _make_api_request(self, endpoint: str, params: Dict[str, Any] = None, retry_count: int = 0, cancellation_token: Dict[str, bool] = None) -> Dict[str, Any]:
+    async def _make_api_request(self, endpoint: str, params: Dict[str, Any] = None, retry_count: int = 0, cancellation_token: Dict[str, bool] = None, paced: bool = True) -> Dict[str, Any]:
         """
         Make a request to the Facebook Graph API with automatic pagination handling, proper error handling and rate limiting.
         
@@ -284,6 +300,7 @@ class FacebookAdService:
             params: Request parameters
             retry_count: Current retry attempt (internal use)
             cancellation_token: Optional cancellation token to check for job cancellation
+            paced: Space requests REQUEST_DELAY apart; callers that bound their own concurrency can turn it off
         
         Returns:
             JSON response data with complete paginated results
@@ -307,22 +324,22 @@ class FacebookAdService:
             self.__class__._request_count += 1
             self._track_request_rate()
             
-            # Wait for rate limit before making the request
-            now = datetime.utcnow().timestamp()
-            if hasattr(self, '_last_request_time'):
-                time_since_last = now - self._last_request_time
-                if time_since_last < self.REQUEST_DELAY:
-                    wait_time = self.REQUEST_DELAY - time_since_last
-                    logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds before request")
-                    await asyncio.sleep(wait_time)
+            # Wait for rate limit before making the request; the lock makes concurrent callers
+            # take turns instead of all reading the same timestamp and firing together
+            if paced:
+                async with self._pacing_lock:
+                    time_since_last = datetime.utcnow().timestamp() - self._last_request_time
+                    if time_since_last < self.REQUEST_DELAY:
+                        wait_time = self.REQUEST_DELAY - time_since_last
+                        logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds before request")
+                        await asyncio.sleep(wait_time)
+                    self._last_request_time = datetime.utcnow().timestamp()
             
             # Check for cancellation after rate limit wait
             if cancellation_token and cancellation_token.get("cancelled", False):
                 logger.info(f"Request to {url.split('?')[0]} cancelled after rate limit wait")
                 raise ValueError("Request cancelled")
             
-            self._last_request_time = datetime.utcnow().timestamp()
-            
             # Log the request details
             logger.debug(f"Making request to {url} params: {params.get('fields', '')[:50]}...")
             request_start = time.time()
@@ -343,7 +360,7 @@ class FacebookAdService:
             logger.debug(f"Response received in {request_time:.2f}s with status {response.status_code}")
             
             response.raise_for_status()
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             
             # Handle pagination for responses with data arrays
             if "data" in response_data and isinstance(response_data["data"], list):
@@ -377,7 +394,7 @@ class FacebookAdService:
                             pagination_params['limit'] = query_params['limit'][0]
                         
                         # Make recursive call for pagination (with same retry and cancellation support)
-                        paginated_response = await self._make_api_request(endpoint, pagination_params, 0, cancellation_token)
+                        paginated_response = await self._make_api_request(endpoint, pagination_params, 0, cancellation_token, paced)
                         
                         if "data" in paginated_response and paginated_response["data"]:
                             all_data.extend(paginated_response["data"])
@@ -419,7 +436,7 @@ class FacebookAdService:
                 delay = (self.RATE_LIMIT_DELAY * 2 * (2 ** retry_count)) + random.uniform(1, 5)
                 logger.warning(f"Request timeout for URL {url.split('?')[0]}, retrying in {delay:.2f} seconds... (Attempt {retry_count + 1}/{self.MAX_RETRIES})")
                 await asyncio.sleep(delay)
-                return await self._make_api_request(endpoint, params, retry_count + 1, cancellation_token)
+                return await self._make_api_request(endpoint, params, retry_count + 1, cancellation_token, paced)
             else:
                 error_msg = f"Max retries reached after timeouts: {url.split('?')[0]}"
                 logger.error(error_msg)
@@ -432,7 +449,7 @@ class FacebookAdService:
                     logger.warning(f"Rate limit hit for URL {url.split('?')[0]}, retrying in {delay:.2f} seconds... (Attempt {retry_count + 1}/{self.MAX_RETRIES})")
                     logger.warning(f"Rate limit response: {e.response.text[:200]}")
                     await asyncio.sleep(delay)
-                    return await self._make_api_request(endpoint, params, retry_count + 1, cancellation_token)
+                    return await self._make_api_request(endpoint, params, retry_count + 1, cancellation_token, paced)
                 else:
                     error_msg = f"Max retries reached for rate limit: {url.split('?')[0]}"
                     logger.error(error_msg)
@@ -1,21 +1,71 @@
 import asyncio
+import json
 import logging
 import random
+import re
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from openai import OpenAI
+from typing import Dict, Any, Optional, List, Tuple
+import httpx
+import tiktoken
+from openai import AsyncOpenAI, NOT_GIVEN
 from openai import RateLimitError, APITimeoutError, APIError
 from app.core.config import settings
 import openai
 
 logger = logging.getLogger(__name__)
 
+class TokenBucket:
+    """
+    Asyncio token bucket that refills continuously up to its per-minute capacity.
+    Callers reserve capacity before a request instead of reacting to 429 responses.
+    """
+    
+    def __init__(self, capacity_per_minute: int):
+        self.capacity = capacity_per_minute
+        self.refill_rate = capacity_per_minute / 60.0  # per second
+        self._tokens = float(capacity_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+    
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` tokens are available and reserve them."""
+        # Never wait for more than the bucket can ever hold
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.refill_rate)
+    
+    def reconcile(self, reserved: float, actual: float):
+        """Return over-reserved tokens to the bucket, or charge the shortfall."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + reserved - actual)
+
 class OpenAIService:
     MAX_RETRIES = 3
     RETRY_DELAY = 2  # seconds
     RATE_LIMIT_DELAY = 5  # seconds
-    REQUEST_DELAY = 0.5  # Delay between requests to respect rate limits
+    
+    # Preemptive rate limiting knobs; per-minute limits come from settings
+    MAX_CONCURRENT_REQUESTS = 20
+    # Pause new requests until the window resets once the x-ratelimit-remaining-* headers drop below these
+    MIN_REMAINING_REQUESTS = 5
+    MIN_REMAINING_TOKENS = 2000
+    # Connection pool sized above MAX_CONCURRENT_REQUESTS so requests never queue on the transport
+    MAX_CONNECTIONS = 100
+    MAX_KEEPALIVE_CONNECTIONS = 50
+    
+    IMAGE_TOKEN_ESTIMATE = 765  # Tokens for a high detail image tile set
+    LOW_DETAIL_IMAGE_TOKENS = 85
     
     # Global tracking of requests to help debug rate limits
     _request_times = []
@@ -24,7 +74,10 @@ class OpenAIService:
     def __init__(self):
         self.client = None
         self._initialize_client()
-        self._last_request_time = 0  # Track last request time
+        self.request_bucket = TokenBucket(settings.openai_max_rpm)
+        self.token_bucket = TokenBucket(settings.openai_max_tpm)
+        self._concurrency = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        self._paused_until = 0.0  # time.monotonic() until which requests wait after a 429
         
         logger.info("Initializing OpenAIService with rate limiting")
     
@@ -41,18 +94,39 @@ class OpenAIService:
             
             if api_key:
                 openai.api_key = api_key
-                self.client = OpenAI(api_key=api_key)  # Use new OpenAI client
+                # Async client over a pooled HTTP/2 transport, shared by all concurrent requests
+                self.client = AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=httpx.AsyncClient(
+                        http2=True,
+                        limits=httpx.Limits(
+                            max_connections=self.MAX_CONNECTIONS,
+                            max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS
+                        ),
+                        timeout=httpx.Timeout(120.0, connect=10.0)
+                    )
+                )
                 logger.info("OpenAI client initialized successfully")
             else:
                 logger.warning("OpenAI API key not found in settings")
         except Exception as e:
             logger.error(f"Error initializing OpenAI client: {str(e)}")
     
-    def cleanup(self):
+    async def warmup(self):
+        """Open the pooled HTTP/2 connection ahead of the first real request, paying the TLS handshake at startup."""
+        if not self.client:
+            return
+        try:
+            await self.client.models.retrieve("gpt-4o", timeout=10)
+            logger.info("OpenAI connection pool warmed up")
+        except Exception as e:
+            logger.debug(f"OpenAI warmup request failed: {e}")
+    
+    async def cleanup(self):
         """Clean up resources."""
         if self.client is not None:
             try:
-                self.client.close()
+                await self.client.close()
                 logger.debug("OpenAI client closed successfully")
             except Exception as e:
                 logger.debug(f"Error closing OpenAI client: {e}")
@@ -77,13 +151,85 @@ class OpenAIService:
             requests_per_minute = len(cls._request_times)
             logger.warning(f"OpenAI API request rate: {requests_per_minute} requests in the last minute")
     
+    def _retry_after_delay(self, error: RateLimitError, attempt: int) -> float:
+        """Seconds to wait after a 429, preferring the server's Retry-After headers over exponential backoff."""
+        headers = error.response.headers if getattr(error, "response", None) is not None else {}
+        try:
+            if headers.get("retry-after-ms") is not None:
+                delay = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after") is not None:
+                delay = float(headers["retry-after"])
+            else:
+                delay = self.RATE_LIMIT_DELAY * (2 ** attempt)
+        except ValueError:
+            delay = self.RATE_LIMIT_DELAY * (2 ** attempt)
+        return delay + random.uniform(0, 0.5)
+    
+    def _pause_requests(self, delay: float):
+        """Make all requests on this service wait until the rate limit window has passed."""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+    
+    async def _wait_for_rate_limit_pause(self):
+        remaining = self._paused_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+    
+    @staticmethod
+    def _parse_reset_duration(value: Optional[str]) -> float:
+        """Parse an x-ratelimit-reset-* header such as "6m0s", "1.5s" or "20ms" into seconds."""
+        if not value:
+            return 0.0
+        units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+        return sum(float(amount) * units[unit] for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value))
+    
+    def _throttle_from_headers(self, headers):
+        """Pause new requests before the server starts answering 429s, based on the rate limit headers."""
+        try:
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and int(remaining_requests) < self.MIN_REMAINING_REQUESTS:
+                delay = self._parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                logger.info(f"Only {remaining_requests} requests left in the rate limit window, pausing {delay:.2f}s")
+                self._pause_requests(delay)
+            
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None and int(remaining_tokens) < self.MIN_REMAINING_TOKENS:
+                delay = self._parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                logger.info(f"Only {remaining_tokens} tokens left in the rate limit window, pausing {delay:.2f}s")
+                self._pause_requests(delay)
+        except ValueError as e:
+            logger.debug(f"Could not parse rate limit headers: {e}")
+    
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], model: str, max_tokens: Optional[int]) -> int:
+        """Estimate the TPM cost of a request: prompt text, attached images and the response budget."""
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        
+        total = 0
+        for message in messages:
+            content = message.get("content", "")
+            if isinstance(content, str):
+                total += len(encoding.encode(content))
+                continue
+            for part in content or []:
+                if part.get("type") == "text":
+                    total += len(encoding.encode(part.get("text", "")))
+                elif part.get("type") == "image_url":
+                    detail = part.get("image_url", {}).get("detail", "high")
+                    total += self.LOW_DETAIL_IMAGE_TOKENS if detail == "low" else self.IMAGE_TOKEN_ESTIMATE
+        
+        return total + (max_tokens or 0)
+    
     async def _make_chat_completion(
         self,
         messages: List[Dict[str, Any]],
         model: str = "gpt-3.5-turbo",
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-        cancellation_token: Optional[Dict[str, bool]] = None
+        cancellation_token: Optional[Dict[str, bool]] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        logit_bias: Optional[Dict[str, int]] = None
     ) -> Optional[str]:
         """
         Core method for making chat completions with retry logic and rate limiting.
@@ -95,6 +241,8 @@ class OpenAIService:
             temperature: Creativity level (0-1)
             max_tokens: Maximum tokens in response
             cancellation_token: Optional cancellation token
+            response_format: Optional response format, e.g. {"type": "json_object"}
+            logit_bias: Optional token id -> bias map, e.g. to restrict output to a set of labels
         
         Returns:
             AI generated response or None if failed
@@ -111,81 +259,95 @@ class OpenAIService:
         # Track request rate
         self._track_request_rate()
         
-        # Rate limiting - ensure we don't exceed request limits
-        current_time = time.time()
-        time_since_last_request = current_time - self._last_request_time
+        estimated_tokens = self._estimate_tokens(messages, model, max_tokens)
+        # Retries reuse the reservation; if no attempt gets a response, its tokens are returned
+        reserved = False
+        settled = False
         
-        if time_since_last_request < self.REQUEST_DELAY:
-            delay = self.REQUEST_DELAY - time_since_last_request
-            logger.debug(f"Rate limiting: waiting {delay:.2f} seconds")
-            await asyncio.sleep(delay)
-        
-        self._last_request_time = time.time()
-        
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                # Check for cancellation before each attempt
-                if cancellation_token and cancellation_token.get("cancelled", False):
-                    logger.info(f"Request cancelled during attempt {attempt + 1}")
-                    return None
-                
-                logger.debug(f"Making OpenAI request (attempt {attempt + 1}/{self.MAX_RETRIES})")
-                
-                # Use the new OpenAI client
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.client.chat.completions.create(
-                        model=model,
-                        messages=messages,
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        timeout=30
-                    )
-                )
-                
-                result = response.choices[0].message.content
-                logger.debug(f"OpenAI request successful (attempt {attempt + 1})")
-                
-                return result.strip() if result else None
-                
-            except RateLimitError as e:
-                logger.warning(f"Rate limit error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RATE_LIMIT_DELAY * (2 ** attempt) + random.uniform(0, 1)
-                    logger.info(f"Waiting {delay:.2f} seconds before retry...")
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("Max retries exceeded for rate limit error")
-                    raise ValueError("Rate limit exceeded after max retries")
+        try:
+            for attempt in range(self.MAX_RETRIES):
+                try:
+                    # Check for cancellation before each attempt
+                    if cancellation_token and cancellation_token.get("cancelled", False):
+                        logger.info(f"Request cancelled during attempt {attempt + 1}")
+                        return None
                     
-            except APITimeoutError as e:
-                logger.warning(f"Timeout error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAY * (attempt + 1)
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("Max retries exceeded for timeout error")
-                    return None
+                    # Rate limiting - reserve request and token capacity once, before the first dispatch
+                    await self._wait_for_rate_limit_pause()
+                    if not reserved:
+                        await self.request_bucket.acquire(1)
+                        await self.token_bucket.acquire(estimated_tokens)
+                        reserved = True
                     
-            except APIError as e:
-                logger.error(f"OpenAI API error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAY * (attempt + 1)
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("Max retries exceeded for API error")
-                    return None
+                    logger.debug(f"Making OpenAI request (attempt {attempt + 1}/{self.MAX_RETRIES})")
                     
-            except Exception as e:
-                logger.error(f"Unexpected error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAY * (attempt + 1)
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("Max retries exceeded for unexpected error")
-                    return None
-        
-        return None
+                    # Use the new OpenAI client
+                    async with self._concurrency:
+                        raw_response = await self.client.chat.completions.with_raw_response.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            response_format=response_format or NOT_GIVEN,
+                            logit_bias=logit_bias or NOT_GIVEN,
+                            timeout=30
+                        )
+                    
+                    self._throttle_from_headers(raw_response.headers)
+                    response = raw_response.parse()
+                    
+                    settled = True
+                    if response.usage:
+                        self.token_bucket.reconcile(estimated_tokens, response.usage.total_tokens)
+                    
+                    result = response.choices[0].message.content
+                    logger.debug(f"OpenAI request successful (attempt {attempt + 1})")
+                    
+                    return result.strip() if result else None
+                    
+                except RateLimitError as e:
+                    logger.warning(f"Rate limit error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                    if attempt < self.MAX_RETRIES - 1:
+                        delay = self._retry_after_delay(e, attempt)
+                        logger.info(f"Waiting {delay:.2f} seconds before retry...")
+                        # Hold back every other request too, so they don't all hit the limit again
+                        self._pause_requests(delay)
+                        await self._wait_for_rate_limit_pause()
+                    else:
+                        logger.error("Max retries exceeded for rate limit error")
+                        raise ValueError("Rate limit exceeded after max retries")
+                        
+                except APITimeoutError as e:
+                    logger.warning(f"Timeout error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                    if attempt < self.MAX_RETRIES - 1:
+                        delay = self.RETRY_DELAY * (attempt + 1)
+                        await asyncio.sleep(delay)
+                    else:
+                        logger.error("Max retries exceeded for timeout error")
+                        return None
+                        
+                except APIError as e:
+                    logger.error(f"OpenAI API error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                    if attempt < self.MAX_RETRIES - 1:
+                        delay = self.RETRY_DELAY * (attempt + 1)
+                        await asyncio.sleep(delay)
+                    else:
+                        logger.error("Max retries exceeded for API error")
+                        return None
+                        
+                except Exception as e:
+                    logger.error(f"Unexpected error (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                    if attempt < self.MAX_RETRIES - 1:
+                        delay = self.RETRY_DELAY * (attempt + 1)
+                        await asyncio.sleep(delay)
+                    else:
+                        logger.error("Max retries exceeded for unexpected error")
+                        return None
+            
+            return None
+        finally:
+            if reserved and not settled:
+                self.token_bucket.reconcile(estimated_tokens, 0)
     
     async def get_completion(
         self,
@@ -340,7 +502,8 @@ class OpenAIService:
         model: str = "whisper-1", 
         language: str = "ur",
         prompt: Optional[str] = None,
-        cancellation_token: Optional[Dict[str, bool]] = None
+        cancellation_token: Optional[Dict[str, bool]] = None,
+        audio_data: Optional[Tuple[str, bytes]] = None
     ) -> Optional[str]:
         """
         Core method for making transcriptions with retry logic and rate limiting.
@@ -351,6 +514,7 @@ class OpenAIService:
             language: Language code (default: ur for Urdu)
             prompt: Optional prompt to guide transcription
             cancellation_token: Optional cancellation token
+            audio_data: Optional in-memory (filename, bytes) audio to upload instead of the file
         
         Returns:
             Transcribed text or None if failed
@@ -367,17 +531,6 @@ class OpenAIService:
         # Track request rate
         self._track_request_rate()
         
-        # Rate limiting - ensure we don't exceed request limits
-        current_time = time.time()
-        time_since_last_request = current_time - self._last_request_time
-        
-        if time_since_last_request < self.REQUEST_DELAY:
-            delay = self.REQUEST_DELAY - time_since_last_request
-            logger.debug(f"Rate limiting: waiting {delay:.2f} seconds")
-            await asyncio.sleep(delay)
-        
-        self._last_request_time = time.time()
-        
         for attempt in range(self.MAX_RETRIES):
             try:
                 # Check for cancellation before each attempt
@@ -385,6 +538,10 @@ class OpenAIService:
                     logger.info(f"Transcription cancelled during attempt {attempt + 1}")
                     return None
                 
+                # Rate limiting - reserve request capacity before dispatching
+                await self._wait_for_rate_limit_pause()
+                await self.request_bucket.acquire(1)
+                
                 logger.debug(f"Making OpenAI transcription request (attempt {attempt + 1}/{self.MAX_RETRIES})")
                 
                 # Prepare transcription parameters
@@ -398,14 +555,19 @@ class OpenAIService:
                     transcription_params["prompt"] = prompt
                 
                 # Use the new OpenAI client for transcription
-                with open(audio_file_path, "rb") as audio_file:
-                    response = await asyncio.get_event_loop().run_in_executor(
-                        None,
-                        lambda: self.client.audio.transcriptions.create(
-                            file=audio_file,
+                if audio_data is not None:
+                    async with self._concurrency:
+                        response = await self.client.audio.transcriptions.create(
+                            file=audio_data,
                             **transcription_params
                         )
-                    )
+                else:
+                    with open(audio_file_path, "rb") as audio_file:
+                        async with self._concurrency:
+                            response = await self.client.audio.transcriptions.create(
+                                file=audio_file,
+                                **transcription_params
+                            )
                 
                 result = response.text
                 logger.debug(f"OpenAI transcription successful (attempt {attempt + 1})")
@@ -415,9 +577,11 @@ class OpenAIService:
             except RateLimitError as e:
                 logger.warning(f"Rate limit error in transcription (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
                 if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RATE_LIMIT_DELAY * (2 ** attempt) + random.uniform(0, 1)
+                    delay = self._retry_after_delay(e, attempt)
                     logger.info(f"Waiting {delay:.2f} seconds before retry...")
-                    await asyncio.sleep(delay)
+                    # Hold back every other request too, so they don't all hit the limit again
+                    self._pause_requests(delay)
+                    await self._wait_for_rate_limit_pause()
                 else:
                     logger.error("Max retries exceeded for transcription rate limit error")
                     raise ValueError("Rate limit exceeded after max retries")
@@ -455,5 +619,159 @@ class OpenAIService:
         
         return None
 
+    async def _make_embedding(
+        self,
+        text: str,
+        model: str = "text-embedding-3-small",
+        cancellation_token: Optional[Dict[str, bool]] = None
+    ) -> Optional[List[float]]:
+        """
+        Core method for creating text embeddings with retry logic and rate limiting.
+        
+        Args:
+            text: Text to embed
+            model: OpenAI embedding model to use
+            cancellation_token: Optional cancellation token
+        
+        Returns:
+            Embedding vector or None if failed
+        """
+        if not self.client:
+            logger.error("OpenAI client not initialized")
+            return None
+        
+        # Track request rate
+        self._track_request_rate()
+        
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                # Check for cancellation before each attempt
+                if cancellation_token and cancellation_token.get("cancelled", False):
+                    logger.info(f"Embedding cancelled during attempt {attempt + 1}")
+                    return None
+                
+                # Rate limiting - reserve request capacity before dispatching
+                await self._wait_for_rate_limit_pause()
+                await self.request_bucket.acquire(1)
+                
+                async with self._concurrency:
+                    response = await self.client.embeddings.create(
+                        model=model,
+                        input=text,
+                        timeout=30
+                    )
+                
+                return response.data[0].embedding
+                
+            except RateLimitError as e:
+                logger.warning(f"Rate limit error in embedding (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                if attempt < self.MAX_RETRIES - 1:
+                    delay = self._retry_after_delay(e, attempt)
+                    # Hold back every other request too, so they don't all hit the limit again
+                    self._pause_requests(delay)
+                    await self._wait_for_rate_limit_pause()
+                    
+            except Exception as e:
+                logger.error(f"Error creating embedding (attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                if attempt < self.MAX_RETRIES - 1:
+                    await asyncio.sleep(self.RETRY_DELAY * (attempt + 1))
+        
+        return None
+
+    async def _create_chat_batch(self, requests: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Submit chat completion requests to the OpenAI Batch API.
+        
+        Batches are billed at half price with a 24 hour completion window and
+        do not count against the synchronous rate limits.
+        
+        Args:
+            requests: List of {"custom_id": str, "body": dict} chat completion requests
+        
+        Returns:
+            Batch ID or None if submission failed
+        """
+        if not self.client:
+            logger.error("OpenAI client not initialized")
+            return None
+        
+        try:
+            jsonl = "\n".join(
+                json.dumps({
+                    "custom_id": request["custom_id"],
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": request["body"]
+                })
+                for request in requests
+            ).encode("utf-8")
+            
+            batch_file = await self.client.files.create(file=("batch_input.jsonl", jsonl), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            
+            logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+            return batch.id
+            
+        except Exception as e:
+            logger.error(f"Error submitting OpenAI batch: {e}")
+            return None
+    
+    async def _get_chat_batch_results(self, batch_id: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Fetch the results of a chat completion batch.
+        
+        Args:
+            batch_id: ID returned by _create_chat_batch
+        
+        Returns:
+            Mapping of custom_id to response content (None for failed requests),
+            or None if the batch has not finished yet
+        
+        Raises:
+            ValueError: If the batch failed, expired or was cancelled
+        """
+        if not self.client:
+            raise ValueError("OpenAI client not initialized")
+        
+        batch = await self.client.batches.retrieve(batch_id)
+        
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise ValueError(f"OpenAI batch {batch_id} ended with status {batch.status}")
+        
+        if batch.status != "completed":
+            return None
+        
+        results = {}
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                content = None
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    choices = response.get("body", {}).get("choices", [])
+                    if choices:
+                        content = (choices[0].get("message", {}).get("content") or "").strip() or None
+                results[item["custom_id"]] = content
+        
+        return results
+    
+    async def _cancel_chat_batch(self, batch_id: str):
+        """Cancel a chat completion batch so it stops running and billing. Failures are only logged."""
+        if not self.client:
+            return
+        
+        try:
+            await self.client.batches.cancel(batch_id)
+            logger.info(f"Cancelled OpenAI batch {batch_id}")
+        except Exception as e:
+            logger.warning(f"Error cancelling OpenAI batch {batch_id}: {e}")
+
 # Global instance for use across nodes
 openai_service = OpenAIService() 
\ No newline at end of file
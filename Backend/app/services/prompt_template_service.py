@@ -272,7 +272,7 @@ Transcript:
 {text}""",
                 "model": "gpt-4o",
                 "temperature": 0.5,
-                "max_tokens": None,
+                "max_tokens": 150,
                 "description": "Analyzes advertising transcripts for marketing techniques",
                 "category": "analysis"
             },
@@ -290,10 +290,64 @@ Transcript:
 {text}""",
                 "model": "gpt-4o",
                 "temperature": 0.3,
-                "max_tokens": None,
+                "max_tokens": 60,
                 "description": "Extracts product information from transcripts",
                 "category": "analysis"
             },
+            {
+                "prompt_key": "transcription_analyze_and_extract",
+                "prompt_name": "Transcription Analysis and Product Extraction",
+                "prompt_text": """Aap aik marketing strategist hain jo aik ad ki Urdu transcript ka jaiza le rahe hain.
+
+1. Batayein ke is ad mein kon kon se selling techniques use hui hain. Jaise ke:
+- Emotional kahani sunana
+- Social proof (reviews ya testimonials ka zikr)
+- Urgency (limited time ya "abhi khareedain" ka lafz)
+- Risk reversal (e.g. "agar pasand na aaye to paisay wapas")
+- Viewer se direct connection ("aap ke liye", "aap jaise log")
+- Mukabla ya farq dikhana (e.g. "doosri brands se behtar")
+Sirf unhi cheezon ka zikr karein jo is transcript mein hain.
+
+2. Extract the product information: the exact product name being advertised (give the specific name/brand if mentioned, otherwise describe the product briefly) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON in this format:
+{{"analysis": ["technique 1", "technique 2"], "product": "...", "product_type": "..."}}
+
+Transcript:
+{text}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": 300,
+                "description": "Analyzes a transcript for marketing techniques and extracts its product in one request",
+                "category": "analysis"
+            },
+            {
+                "prompt_key": "transcription_batch_analysis",
+                "prompt_name": "Batch Transcription Analysis",
+                "prompt_text": """Aap aik marketing strategist hain jo kuch ads ki Urdu transcripts ka jaiza le rahe hain. Har transcript [1], [2], ... se numbered hai. Har transcript ke liye:
+
+1. Batayein ke us ad mein kon kon se selling techniques use hui hain. Jaise ke:
+- Emotional kahani sunana
+- Social proof (reviews ya testimonials ka zikr)
+- Urgency (limited time ya "abhi khareedain" ka lafz)
+- Risk reversal (e.g. "agar pasand na aaye to paisay wapas")
+- Viewer se direct connection ("aap ke liye", "aap jaise log")
+- Mukabla ya farq dikhana (e.g. "doosri brands se behtar")
+Sirf unhi cheezon ka zikr karein jo us transcript mein hain.
+
+2. Extract the product information: the exact product name being advertised (give the specific name/brand if mentioned, otherwise describe the product briefly) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON with one entry per transcript, in this format:
+{{"results": [{{"index": 1, "analysis": ["technique 1", "technique 2"], "product": "...", "product_type": "..."}}]}}
+
+Transcripts ({count}):
+{transcripts}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": None,
+                "description": "Analyzes several transcripts for marketing techniques and extracts their products in one request",
+                "category": "analysis"
+            },
             {
                 "prompt_key": "frame_analysis",
                 "prompt_name": "Frame Analysis",
@@ -304,6 +358,22 @@ Transcript:
                 "description": "Analyzes individual video frames for visual characteristics",
                 "category": "analysis"
             },
+            {
+                "prompt_key": "frame_product_analysis",
+                "prompt_name": "Frame and Product Analysis",
+                "prompt_text": """You will receive {frame_count} low resolution advertising images from the same video, in order, followed by one high resolution image from that video.
+
+1. For each of the {frame_count} low resolution images, give me a single word that represents a characteristic of that image to characterize it. Give me only the position of the person, and necessarily what they are doing (example: sitting with the object in their hands, standing explaining, crouching looking at the object) or a characteristic of the background (example: outside, package in the background, red background).
+2. Using all images, extract the product information: the exact product name being advertised (look for any text, brand names, or product labels visible in the images) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON in this format:
+{{"labels": ["...", "..."], "product": {{"product": "...", "product_type": "..."}}}}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": 400,
+                "description": "Labels all frames of a video and extracts its product in one request",
+                "category": "analysis"
+            },
             {
                 "prompt_key": "product_extraction_frames",
                 "prompt_name": "Product Extraction from Frames",
@@ -514,7 +584,7 @@ Transcript:
 {text}""",
                 "model": "gpt-4o",
                 "temperature": 0.5,
-                "max_tokens": None,
+                "max_tokens": 150,
                 "description": "Analyzes advertising transcripts for marketing techniques",
                 "category": "analysis"
             },
@@ -532,10 +602,64 @@ Transcript:
 {text}""",
                 "model": "gpt-4o",
                 "temperature": 0.3,
-                "max_tokens": None,
+                "max_tokens": 60,
                 "description": "Extracts product information from transcripts",
                 "category": "analysis"
             },
+            "transcription_analyze_and_extract": {
+                "prompt_key": "transcription_analyze_and_extract",
+                "prompt_name": "Transcription Analysis and Product Extraction",
+                "prompt_text": """Aap aik marketing strategist hain jo aik ad ki Urdu transcript ka jaiza le rahe hain.
+
+1. Batayein ke is ad mein kon kon se selling techniques use hui hain. Jaise ke:
+- Emotional kahani sunana
+- Social proof (reviews ya testimonials ka zikr)
+- Urgency (limited time ya "abhi khareedain" ka lafz)
+- Risk reversal (e.g. "agar pasand na aaye to paisay wapas")
+- Viewer se direct connection ("aap ke liye", "aap jaise log")
+- Mukabla ya farq dikhana (e.g. "doosri brands se behtar")
+Sirf unhi cheezon ka zikr karein jo is transcript mein hain.
+
+2. Extract the product information: the exact product name being advertised (give the specific name/brand if mentioned, otherwise describe the product briefly) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON in this format:
+{{"analysis": ["technique 1", "technique 2"], "product": "...", "product_type": "..."}}
+
+Transcript:
+{text}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": 300,
+                "description": "Analyzes a transcript for marketing techniques and extracts its product in one request",
+                "category": "analysis"
+            },
+            "transcription_batch_analysis": {
+                "prompt_key": "transcription_batch_analysis",
+                "prompt_name": "Batch Transcription Analysis",
+                "prompt_text": """Aap aik marketing strategist hain jo kuch ads ki Urdu transcripts ka jaiza le rahe hain. Har transcript [1], [2], ... se numbered hai. Har transcript ke liye:
+
+1. Batayein ke us ad mein kon kon se selling techniques use hui hain. Jaise ke:
+- Emotional kahani sunana
+- Social proof (reviews ya testimonials ka zikr)
+- Urgency (limited time ya "abhi khareedain" ka lafz)
+- Risk reversal (e.g. "agar pasand na aaye to paisay wapas")
+- Viewer se direct connection ("aap ke liye", "aap jaise log")
+- Mukabla ya farq dikhana (e.g. "doosri brands se behtar")
+Sirf unhi cheezon ka zikr karein jo us transcript mein hain.
+
+2. Extract the product information: the exact product name being advertised (give the specific name/brand if mentioned, otherwise describe the product briefly) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON with one entry per transcript, in this format:
+{{"results": [{{"index": 1, "analysis": ["technique 1", "technique 2"], "product": "...", "product_type": "..."}}]}}
+
+Transcripts ({count}):
+{transcripts}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": None,
+                "description": "Analyzes several transcripts for marketing techniques and extracts their products in one request",
+                "category": "analysis"
+            },
             "frame_analysis": {
                 "prompt_key": "frame_analysis",
                 "prompt_name": "Frame Analysis",
@@ -546,6 +670,22 @@ Transcript:
                 "description": "Analyzes individual video frames for visual characteristics",
                 "category": "analysis"
             },
+            "frame_product_analysis": {
+                "prompt_key": "frame_product_analysis",
+                "prompt_name": "Frame and Product Analysis",
+                "prompt_text": """You will receive {frame_count} low resolution advertising images from the same video, in order, followed by one high resolution image from that video.
+
+1. For each of the {frame_count} low resolution images, give me a single word that represents a characteristic of that image to characterize it. Give me only the position of the person, and necessarily what they are doing (example: sitting with the object in their hands, standing explaining, crouching looking at the object) or a characteristic of the background (example: outside, package in the background, red background).
+2. Using all images, extract the product information: the exact product name being advertised (look for any text, brand names, or product labels visible in the images) and the category it belongs to (e.g., islamic product, cosmetic, fashion, tech, food, health, education, clothing, jewelry, electronics, etc.).
+
+Return only a JSON in this format:
+{{"labels": ["...", "..."], "product": {{"product": "...", "product_type": "..."}}}}""",
+                "model": "gpt-4o",
+                "temperature": 0.3,
+                "max_tokens": 400,
+                "description": "Labels all frames of a video and extracts its product in one request",
+                "category": "analysis"
+            },
             "product_extraction_frames": {
                 "prompt_key": "product_extraction_frames",
                 "prompt_name": "Product Extraction from Frames",
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.database import get_database
+from app.services.openai_service import openai_service
+
+logger = logging.getLogger(__name__)
+
+class SemanticCacheService:
+    """
+    Cache of model responses looked up by embedding similarity, so near-duplicate
+    texts (e.g. a re-cut of the same ad script) reuse an earlier response.
+
+    Only use it for responses that don't depend on specifics a near-duplicate may change,
+    such as product or brand names, and scope namespaces to a single user.
+    """
+
+    COLLECTION = "semantic_cache"
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    SIMILARITY_THRESHOLD = 0.95
+    # Entries expire from MongoDB through a TTL index on created_at (see main.py)
+    ENTRY_TTL_DAYS = 30
+    # Most recent entries kept in memory per namespace
+    MAX_INDEX_ENTRIES = 2000
+
+    def __init__(self):
+        # namespace -> (normalized embedding matrix, cached results)
+        self._indexes: Dict[str, Tuple[np.ndarray, list]] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def _get_index(self, namespace: str) -> Tuple[np.ndarray, list]:
+        """Load the namespace's embeddings from MongoDB once per process."""
+        if namespace in self._indexes:
+            return self._indexes[namespace]
+
+        async with self._load_lock:
+            if namespace not in self._indexes:
+                embeddings, results = [], []
+                cursor = get_database()[self.COLLECTION].find(
+                    {
+                        "namespace": namespace,
+                        "created_at": {"$gte": datetime.utcnow() - timedelta(days=self.ENTRY_TTL_DAYS)}
+                    },
+                    {"embedding": 1, "result": 1}
+                ).sort("created_at", -1).limit(self.MAX_INDEX_ENTRIES)
+                async for doc in cursor:
+                    embeddings.append(doc["embedding"])
+                    results.append(doc["result"])
+                # Oldest first, so eviction drops the leading rows
+                embeddings.reverse()
+                results.reverse()
+
+                matrix = np.asarray(embeddings, dtype=np.float32) if embeddings else np.empty((0, 0), dtype=np.float32)
+                self._indexes[namespace] = (self._normalize(matrix), results)
+                logger.info(f"Loaded {len(results)} semantic cache entries for '{namespace}'")
+
+        return self._indexes[namespace]
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    async def semantic_lookup(self, text: str, namespace: str, cancellation_token=None) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Find a cached response for a text similar to the given one.
+
+        Args:
+            text: Text to look up
+            namespace: Cache namespace, usually the prompt key
+            cancellation_token: Optional cancellation token
+
+        Returns:
+            tuple: (cached response or None, embedding of the text to pass to add(), or None if embedding failed)
+        """
+        try:
+            embedding = await openai_service._make_embedding(text, self.EMBEDDING_MODEL, cancellation_token)
+            if embedding is None:
+                return None, None
+
+            query = self._normalize(np.asarray(embedding, dtype=np.float32))
+            matrix, results = await self._get_index(namespace)
+            if results:
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.SIMILARITY_THRESHOLD:
+                    logger.debug(f"Semantic cache hit for '{namespace}' (similarity {scores[best]:.3f})")
+                    return results[best], query
+
+            return None, query
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed for '{namespace}': {e}")
+            return None, None
+
+    async def add(self, text: str, namespace: str, embedding: np.ndarray, result: str):
+        """Store a response under the embedding returned by semantic_lookup()."""
+        try:
+            await get_database()[self.COLLECTION].insert_one({
+                "namespace": namespace,
+                "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                "embedding": embedding.tolist(),
+                "result": result,
+                "created_at": datetime.utcnow()
+            })
+
+            await self._get_index(namespace)
+            # Read-modify-write of the index, so concurrent adds don't drop each other's entries
+            async with self._load_lock:
+                matrix, results = self._indexes[namespace]
+                matrix = np.vstack([matrix.reshape(-1, embedding.shape[0]), embedding])[-self.MAX_INDEX_ENTRIES:]
+                self._indexes[namespace] = (matrix, (results + [result])[-self.MAX_INDEX_ENTRIES:])
+        except Exception as e:
+            logger.warning(f"Semantic cache write failed for '{namespace}': {e}")
+
+# Global instance for use across nodes
+semantic_cache_service = SemanticCacheService()
@@ -6,6 +6,13 @@ from app.core.database import get_database
 from app.core.security import get_password_hash, verify_password, create_access_token
 from app.models.user import UserCreate, UserInDB, User, UserResponse, FacebookProfile, FacebookCredentials
 
+# Legacy top-level user fields that hold Facebook credentials, in precedence order (later wins)
+_LEGACY_FACEBOOK_CREDENTIAL_FIELDS = (
+    ("fb_graph_api_key", "access_token"),
+    ("fb_ad_account_id", "account_id"),
+    ("facebook_access_token", "access_token"),
+)
+
 class UserService:
     async def create_user(self, user: UserCreate) -> UserResponse:
         """Create a new user with the given user data."""
@@ -56,23 +63,16 @@ class UserService:
         # Check for facebook_credentials in the user document
         credentials = {}
         
-        if "facebook_credentials" in user and user["facebook_credentials"]:
+        if user.get("facebook_credentials"):
             credentials = user["facebook_credentials"]
             logger.info("Found credentials in facebook_credentials field")
             
         # Check for credentials in alternative formats (even if we already found some)
-        if "fb_graph_api_key" in user and user["fb_graph_api_key"]:
-            credentials["access_token"] = user["fb_graph_api_key"]
-            logger.info("Found access_token in fb_graph_api_key field")
-            
-        if "fb_ad_account_id" in user and user["fb_ad_account_id"]:
-            credentials["account_id"] = user["fb_ad_account_id"]
-            logger.info("Found account_id in fb_ad_account_id field")
-            
-        # Extra check for facebook_access_token field
-        if "facebook_access_token" in user and user["facebook_access_token"]:
-            credentials["access_token"] = user["facebook_access_token"]
-            logger.info("Found access_token in facebook_access_token field")
+        for legacy_field, credential_key in _LEGACY_FACEBOOK_CREDENTIAL_FIELDS:
+            value = user.get(legacy_field)
+            if value:
+                credentials[credential_key] = value
+                logger.info(f"Found {credential_key} in {legacy_field} field")
         
         # Check if we have both required credentials
         if "access_token" in credentials and "account_id" in credentials: